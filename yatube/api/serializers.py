@@ -0,0 +1,41 @@
+"""Компактная сериализация постов и комментариев в словари.
+
+Связанные объекты отдаются одним значением (username, slug), а не
+вложенными словарями. ?fields= сужает набор полей ответа.
+"""
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date,
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'comments_count': lambda post: post.comments_count,
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created,
+}
+
+
+class UnknownFields(Exception):
+    pass
+
+
+def select_fields(available, fields=None):
+    """Проверяет ?fields= и возвращает нужные геттеры по порядку."""
+    if not fields:
+        return available
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise UnknownFields(unknown)
+    return {name: available[name] for name in names}
+
+
+def serialize(obj, getters):
+    return {name: getter(obj) for name, getter in getters.items()}
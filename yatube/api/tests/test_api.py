@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ApiAuthor')
+        cls.reader = User.objects.create_user(username='ApiReader')
+        cls.group = Group.objects.create(
+            title='Группа API', slug='api-group', description='Описание'
+        )
+        for number in range(settings.POSTS_AMOUNT + 2):
+            cls.post = Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+        cls.post.comments.create(author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds(self):
+        """Ленты отдают посты страницами по курсору"""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_list', args=(self.group.slug,)),
+            reverse('api:profile', args=(self.author.username,)),
+            reverse('api:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.reader_client.get(url).json()
+                self.assertEqual(len(data['results']), settings.POSTS_AMOUNT)
+                self.assertEqual(data['results'][0]['id'], self.post.pk)
+                self.assertEqual(
+                    data['results'][0]['author'], self.author.username
+                )
+                self.assertIsNone(data['previous'])
+                data = self.reader_client.get(
+                    url, {'cursor': data['next']}
+                ).json()
+                self.assertEqual(len(data['results']), 2)
+                self.assertIsNone(data['next'])
+
+    def test_fields_selection(self):
+        """?fields= оставляет только нужные поля"""
+        data = self.client.get(
+            reverse('api:index'), {'fields': 'id,comments_count'}
+        ).json()
+        self.assertEqual(
+            data['results'][0], {'id': self.post.pk, 'comments_count': 1}
+        )
+        response = self.client.get(reverse('api:index'), {'fields': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_and_comments(self):
+        """Пост и его комментарии"""
+        data = self.client.get(
+            reverse('api:post_detail', args=(self.post.pk,))
+        ).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['group'], self.group.slug)
+        data = self.client.get(
+            reverse('api:comments', args=(self.post.pk,))
+        ).json()
+        self.assertEqual(data['results'][0]['text'], 'Комментарий')
+
+    def test_follow_requires_login(self):
+        """Лента подписок без авторизации — 401"""
+        response = self.client.get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_conditional_get(self):
+        """Неизменившаяся лента отдаёт 304, правка меняет ETag"""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Правка'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Правка')
+
+    def test_new_comment_changes_comments_etag(self):
+        """Новый комментарий меняет ETag комментариев поста"""
+        url = reverse('api:comments', args=(self.post.pk,))
+        etag = self.client.get(url)['ETag']
+        self.post.comments.create(author=self.reader, text='Ещё один')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_comment_changes_feed_etags(self):
+        """Новый комментарий меняет ETag лент со счётчиком комментариев"""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_list', args=(self.group.slug,)),
+            reverse('api:profile', args=(self.author.username,)),
+            reverse('api:follow_index'),
+        )
+        etags = {url: self.reader_client.get(url)['ETag'] for url in urls}
+        self.post.comments.create(author=self.reader, text='Ещё один')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json()['results'][0]['comments_count'], 2
+                )
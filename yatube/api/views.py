@@ -0,0 +1,144 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from core.conditional import conditional_page
+from core.db.replicas import replica_reads
+from posts import stamps
+from posts.models import Comment, Group, Post, User
+from posts.paginator import CursorPaginator, InvalidCursor
+from posts.timeline import timeline_posts
+from .serializers import (
+    COMMENT_FIELDS, POST_FIELDS, UnknownFields, select_fields, serialize,
+)
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def error_response(detail, status=400):
+    return json_response({'detail': detail}, status=status)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error_response('Требуется авторизация', status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def requested_fields(request, available):
+    """Геттеры полей из ?fields= и ответ 400, если поле неизвестно."""
+    try:
+        return select_fields(available, request.GET.get('fields')), None
+    except UnknownFields as error:
+        return None, error_response(
+            'Неизвестные поля: {}'.format(', '.join(error.args[0]))
+        )
+
+
+def paginated_response(request, queryset, available, per_page,
+                       ordering=('-pub_date', '-id')):
+    getters, error = requested_fields(request, available)
+    if error is not None:
+        return error
+    paginator = CursorPaginator(queryset, per_page, ordering=ordering)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return error_response('Неверный курсор')
+    return json_response({
+        'results': [serialize(obj, getters) for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def index_posts(request):
+    return Post.objects.for_feed()
+
+
+def group_posts_list(request, slug):
+    group = get_object_or_404(Group.objects.only('id'), slug=slug)
+    return group.posts.for_feed()
+
+
+def profile_posts_list(request, username):
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    return Post.objects.for_feed().filter(author=author)
+
+
+def follow_posts(request):
+    return timeline_posts(request.user).for_feed()
+
+
+@require_safe
+@replica_reads
+@conditional_page(stamps.feed, latest=stamps.latest_post)
+def index(request):
+    return paginated_response(
+        request, index_posts(request), POST_FIELDS, settings.POSTS_AMOUNT
+    )
+
+
+@require_safe
+@replica_reads
+@conditional_page(stamps.feed, latest=stamps.latest_group_post)
+def group_posts(request, slug):
+    return paginated_response(
+        request, group_posts_list(request, slug), POST_FIELDS,
+        settings.POSTS_AMOUNT,
+    )
+
+
+@require_safe
+@replica_reads
+@conditional_page(stamps.profile, latest=stamps.latest_author_post)
+def profile_posts(request, username):
+    return paginated_response(
+        request, profile_posts_list(request, username), POST_FIELDS,
+        settings.POSTS_AMOUNT,
+    )
+
+
+@require_safe
+@api_login_required
+@replica_reads
+@conditional_page(
+    stamps.timeline, latest=stamps.latest_timeline_post, personal=True
+)
+def follow_index(request):
+    return paginated_response(
+        request, follow_posts(request), POST_FIELDS, settings.POSTS_AMOUNT
+    )
+
+
+@require_safe
+@replica_reads
+@conditional_page(stamps.post)
+def post_detail(request, post_id):
+    getters, error = requested_fields(request, POST_FIELDS)
+    if error is not None:
+        return error
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
+    return json_response(serialize(post, getters))
+
+
+@require_safe
+@replica_reads
+@conditional_page(stamps.comments, latest=stamps.latest_comment)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    return paginated_response(
+        request, Comment.objects.for_post(post), COMMENT_FIELDS,
+        settings.COMMENTS_AMOUNT, ordering=('-created', '-id'),
+    )
@@ -0,0 +1,104 @@
+"""Кеширование страниц с защитой от «набега» (cache stampede).
+
+Замена cache_page: запись пересчитывается заранее с вероятностью,
+растущей к концу срока жизни (probabilistic early expiration, XFetch),
+а пересчёт выполняет только тот процесс, который взял блокировку;
+остальные в это время отдают устаревшую копию.
+"""
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from django.core.cache import cache
+
+from core import metrics
+from core.conditional import personal_stamps
+
+LOCK_SUFFIX = ':lock'
+
+
+def _should_recompute(entry, beta, now):
+    if entry is None:
+        return True
+    # XFetch: чем дороже пересчёт (delta) и ближе срок, тем вероятнее
+    # пересчитать раньше времени. 1 - random() лежит в (0, 1].
+    jitter = entry['delta'] * beta * math.log(1 - random.random())
+    return now - jitter >= entry['expires']
+
+
+def fetch(key, compute, timeout, beta=1.0, lock_timeout=None):
+    """Возвращает значение по ключу, пересчитывая его не более чем
+    одним процессом одновременно.
+
+    Запись хранится вдвое дольше timeout, чтобы было что отдать, пока
+    держатель блокировки считает новое значение. None не кешируется.
+    """
+    now = time.time()
+    entry = cache.get(key)
+    if not _should_recompute(entry, beta, now):
+        metrics.record_cache(hits=1)
+        return entry['value']
+    lock_key = key + LOCK_SUFFIX
+    if not cache.add(lock_key, 1, lock_timeout or timeout):
+        if entry is not None:
+            metrics.record_cache(hits=1)
+            return entry['value']
+        metrics.record_cache(misses=1)
+        return compute()
+    metrics.record_cache(misses=1)
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        if value is None:
+            return None
+        cache.set(key, {
+            'value': value,
+            'delta': finished - started,
+            'expires': finished + timeout,
+        }, timeout * 2)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def stampede_cache_page(timeout, key_prefix='', version=None, beta=1.0):
+    """Декоратор представления вместо cache_page.
+
+    Кешируются успешные ответы на GET и HEAD без установки cookies.
+    Ключ учитывает полный путь с параметрами, пользователя, его
+    personal_stamps и, если передан, version(request) — например,
+    поколение данных ленты.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            parts = [request.get_full_path(), str(request.user.pk)]
+            parts.extend(str(part) for part in personal_stamps(request))
+            if version is not None:
+                parts.append(str(version(request, *args, **kwargs)))
+            digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+            key = f'stampede_page:{key_prefix}:{digest}'
+            uncacheable = []
+
+            def compute():
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+                if response.status_code != 200 or response.cookies or (
+                    response.streaming
+                ):
+                    uncacheable.append(response)
+                    return None
+                return response
+
+            response = fetch(key, compute, timeout, beta=beta)
+            if response is None:
+                return uncacheable[0]
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,120 @@
+"""SQLite для небольших инсталляций с конкурентной записью.
+
+Тот же бэкенд django.db.backends.sqlite3 с тремя отличиями:
+
+* при подключении выставляются PRAGMAS (WAL, synchronous=NORMAL, кеш
+  страниц, mmap); в WAL читатели не ждут писателя и наоборот;
+* транзакции atomic() открываются BEGIN IMMEDIATE: блокировка записи
+  берётся сразу, с ожиданием busy timeout. При обычном BEGIN транзакция
+  сначала читает, а при первой записи SQLite, чтобы не попасть во
+  взаимоблокировку, сразу отвечает «database is locked», не дожидаясь;
+* запрос вне транзакции (autocommit или сам BEGIN), упавший с
+  «database is locked», повторяется с растущей паузой. Внутри
+  транзакции повтор небезопасен, там ошибка уходит наружу как раньше.
+
+Настраивается через OPTIONS: timeout — busy timeout в секундах,
+pragmas — словарь поверх PRAGMAS, transaction_mode (DEFERRED,
+IMMEDIATE, EXCLUSIVE), lock_retries и lock_retry_delay.
+"""
+import random
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    # В WAL при NORMAL сбой питания может потерять последние коммиты,
+    # но не испортить базу; fsync — только на контрольных точках.
+    'synchronous': 'NORMAL',
+    # Отрицательное значение — в килобайтах: 64 МБ кеша страниц.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+TIMEOUT = 5
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY = 0.05
+
+OWN_OPTIONS = (
+    'pragmas', 'transaction_mode', 'lock_retries', 'lock_retry_delay',
+)
+
+
+def is_locked(error):
+    return 'locked' in str(error)
+
+
+class LockRetryCursor(base.SQLiteCursorWrapper):
+    retries = 0
+    delay = 0
+
+    def execute(self, query, params=None):
+        return self.retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        if not isinstance(param_list, (list, tuple)):
+            # Итератор параметров повторить нельзя.
+            return super().executemany(query, param_list)
+        return self.retry(super().executemany, query, param_list)
+
+    def retry(self, method, *args):
+        attempt = 0
+        while True:
+            try:
+                return method(*args)
+            except base.Database.OperationalError as error:
+                if (
+                    attempt >= self.retries
+                    or self.connection.in_transaction
+                    or not is_locked(error)
+                ):
+                    raise
+            time.sleep(self.delay * 2 ** attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('pragmas', {})}
+        self.transaction_mode = options.get(
+            'transaction_mode', 'IMMEDIATE'
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}'
+            )
+        self.lock_retries = options.get('lock_retries', LOCK_RETRIES)
+        self.lock_retry_delay = options.get(
+            'lock_retry_delay', LOCK_RETRY_DELAY
+        )
+        kwargs = super().get_connection_params()
+        for option in OWN_OPTIONS:
+            kwargs.pop(option, None)
+        kwargs.setdefault('timeout', TIMEOUT)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = dict(self.pragmas)
+        # Режим журнала хранится в самом файле, а смена требует
+        # блокировки записи: без нужды его не трогаем.
+        journal_mode = pragmas.pop('journal_mode', None)
+        if journal_mode is not None:
+            current = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            if current.lower() != journal_mode.lower():
+                conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=LockRetryCursor)
+        cursor.retries = self.lock_retries
+        cursor.delay = self.lock_retry_delay
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,169 @@
+"""Чтение лент с реплик базы.
+
+Представления, помеченные replica_reads, на безопасных запросах (GET,
+HEAD) читают модели из REPLICA_APPS с одной из REPLICA_DATABASES;
+запись и всё остальное идёт в default. Реплика выбирается один раз на
+запрос, чтобы страница и её счётчики читались из одной копии.
+
+Read-your-writes: запрос, который хоть что-то записал, дальше читает
+только primary, а ReplicaMiddleware ставит cookie, и следующие
+REPLICA_PIN_SECONDS секунд этот клиент читает тоже с primary.
+
+Отставание реплики оценивается по маркеру REPLICA_LAG_MARKER — самой
+поздней дате в таблице на primary и на реплике. Реплика, отставшая
+больше REPLICA_MAX_LAG секунд или недоступная, пропускается, пока
+очередная проверка (раз в REPLICA_CHECK_INTERVAL) её не вернёт; если
+годных реплик нет, читается primary.
+"""
+import contextvars
+import random
+import threading
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Max
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+_current = contextvars.ContextVar('replica_state', default=None)
+
+
+class RequestState:
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def start():
+    state = RequestState()
+    return state, _current.set(state)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def pinned(request):
+    """Клиент недавно писал и ещё читает только primary."""
+    try:
+        until = float(request.COOKIES[settings.REPLICA_PIN_COOKIE])
+    except (KeyError, ValueError):
+        return False
+    return until > time.time()
+
+
+def pin(response):
+    until = time.time() + settings.REPLICA_PIN_SECONDS
+    response.set_cookie(
+        settings.REPLICA_PIN_COOKIE, f'{until:.0f}',
+        max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+    )
+
+
+def _latest(alias):
+    app_label, model_name, field = settings.REPLICA_LAG_MARKER.split('.')
+    model = apps.get_model(app_label, model_name)
+    return model._default_manager.using(alias).aggregate(
+        latest=Max(field)
+    )['latest']
+
+
+def lag(alias):
+    """Насколько данные реплики старше primary, в секундах."""
+    primary = _latest(DEFAULT_DB_ALIAS)
+    if primary is None:
+        return 0.0
+    replica = _latest(alias)
+    if replica is None:
+        return float('inf')
+    return max((primary - replica).total_seconds(), 0.0)
+
+
+class Health:
+    """Результаты проверки реплик, общие для потоков процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+
+    def healthy(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            checked_at, ok = self.checked.get(alias, (None, False))
+        if checked_at is not None and (
+            now - checked_at < settings.REPLICA_CHECK_INTERVAL
+        ):
+            return ok
+        try:
+            ok = lag(alias) <= settings.REPLICA_MAX_LAG
+        except DatabaseError:
+            ok = False
+        with self.lock:
+            self.checked[alias] = (now, ok)
+        return ok
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+
+health = Health()
+
+
+def choose():
+    """Случайная годная реплика или None."""
+    aliases = [
+        alias for alias in settings.REPLICA_DATABASES
+        if health.healthy(alias)
+    ]
+    return random.choice(aliases) if aliases else None
+
+
+def replica_reads(view_func):
+    """Разрешает представлению читать с реплики.
+
+    Ставится снаружи conditional_page и кеширующих декораторов, чтобы
+    с реплики читались и метки версий.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        state = _current.get()
+        if (
+            state is None or state.wrote
+            or request.method not in SAFE_METHODS or pinned(request)
+        ):
+            return view_func(request, *args, **kwargs)
+        state.replica = choose()
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            state.replica = None
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+        if model._meta.app_label not in settings.REPLICA_APPS:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии primary, объекты с разных копий совместимы.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+COLUMNS = (
+    ('count', 'запросов', '{:d}'),
+    ('avg_ms', 'сред. мс', '{:.1f}'),
+    ('p50_ms', 'p50', '{}'),
+    ('p95_ms', 'p95', '{}'),
+    ('p99_ms', 'p99', '{}'),
+    ('queries', 'SQL', '{:.1f}'),
+    ('db_ms', 'БД мс', '{:.1f}'),
+    ('template_ms', 'шаблоны мс', '{:.1f}'),
+    ('cache_hit_ratio', 'кеш', '{:.0%}'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Показывает гистограммы времени ответа по именам URL, '
+            'собранные PerformanceMiddleware.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', default='avg_ms',
+            choices=[column for column, _, _ in COLUMNS],
+            help='Столбец для сортировки по убыванию.',
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить накопленные метрики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        report = metrics.snapshot()
+        if not report:
+            self.stdout.write('Метрик пока нет')
+            return
+        sort = options['sort']
+        rows = sorted(
+            report.items(),
+            key=lambda item: item[1][sort] or 0,
+            reverse=True,
+        )
+        width = max(len(name) for name in report)
+        header = ' '.join(
+            [' ' * width] + [f'{title:>10}' for _, title, _ in COLUMNS]
+        )
+        self.stdout.write(header)
+        for name, row in rows:
+            cells = []
+            for column, _, template in COLUMNS:
+                value = row[column]
+                cells.append(
+                    f'{"-" if value is None else template.format(value):>10}'
+                )
+            self.stdout.write(' '.join([f'{name:<{width}}'] + cells))
+        if options['reset']:
+            metrics.reset()
+            self.stdout.write(self.style.SUCCESS('Метрики обнулены'))
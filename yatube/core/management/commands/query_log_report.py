@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import query_log
+
+
+def _place(origin):
+    parts = []
+    code = origin.get('code')
+    if code:
+        parts.append('{file}:{line} ({function})'.format(**code))
+    template = origin.get('template')
+    if template:
+        parts.append('{name}:{line}'.format(**template))
+    return ', '.join(parts) or '?'
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных и повторяющихся SQL: '
+            'худшие запросы по суммарному времени.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', default=settings.QUERY_LOG_FILE,
+            help='Файл журнала; ротированные копии читаются тоже.',
+        )
+        parser.add_argument(
+            '--kind', choices=(query_log.SLOW, query_log.DUPLICATE),
+            help='Только медленные или только повторяющиеся.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько худших запросов показать.',
+        )
+
+    def handle(self, *args, **options):
+        groups = defaultdict(lambda: {
+            'hits': 0, 'queries': 0, 'time': 0.0, 'views': set(),
+        })
+        for record in query_log.read(options['file']):
+            if options['kind'] and record.get('kind') != options['kind']:
+                continue
+            key = (
+                record.get('kind'),
+                record.get('sql'),
+                _place(record.get('origin') or {}),
+            )
+            group = groups[key]
+            group['hits'] += 1
+            group['queries'] += record.get('count', 1)
+            group['time'] += record.get('duration_ms', 0)
+            if record.get('view'):
+                group['views'].add(record['view'])
+        if not groups:
+            self.stdout.write('Журнал пуст')
+            return
+        worst = sorted(
+            groups.items(), key=lambda item: item[1]['time'], reverse=True
+        )[:options['top']]
+        for (kind, sql, place), group in worst:
+            self.stdout.write(self.style.WARNING(
+                f'{kind}: {group["time"]:.1f} мс за {group["hits"]} '
+                f'запросов страниц, SQL выполнен {group["queries"]} раз'
+            ))
+            self.stdout.write(f'  где: {place}')
+            self.stdout.write(
+                '  страницы: ' + ', '.join(sorted(group['views']))
+            )
+            self.stdout.write(f'  {sql[:300]}')
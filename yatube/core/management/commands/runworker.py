@@ -0,0 +1,87 @@
+import multiprocessing
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait,
+)
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает очередь фоновых задач (core.tasks) пулом потоков или '
+        'процессов. Задачи берутся в аренду, упавшие повторяются с '
+        'паузой, выполненные старше TASKS_KEEP_DONE удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        pool = parser.add_mutually_exclusive_group()
+        pool.add_argument(
+            '--threads', type=int,
+            help='Потоков (по умолчанию TASKS_WORKER_THREADS).',
+        )
+        pool.add_argument(
+            '--processes', type=int,
+            help='Процессов вместо потоков: для задач, которые упираются '
+                 'в процессор.',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=None,
+            help='Пауза при пустой очереди, секунд '
+                 '(по умолчанию TASKS_POLL_INTERVAL).',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда готовых задач не останется.',
+        )
+
+    def handle(self, *args, **options):
+        poll = options['poll'] or settings.TASKS_POLL_INTERVAL
+        processes = options['processes']
+        if processes:
+            workers = processes
+            executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context('fork'),
+            )
+        else:
+            workers = options['threads'] or settings.TASKS_WORKER_THREADS
+            executor = ThreadPoolExecutor(
+                workers, thread_name_prefix='runworker',
+            )
+        done = 0
+        purged_at = 0
+        in_flight = set()
+        try:
+            with executor:
+                while True:
+                    if time.monotonic() - purged_at > poll * 60:
+                        tasks.purge()
+                        purged_at = time.monotonic()
+                    ids = tasks.claim(workers * 2 - len(in_flight))
+                    if processes:
+                        # Процессы пула порождаются по требованию, и
+                        # открытое соединение с базой им не передаётся.
+                        connections.close_all()
+                    else:
+                        close_old_connections()
+                    for task_id in ids:
+                        in_flight.add(
+                            executor.submit(tasks.execute_in_worker, task_id)
+                        )
+                    if in_flight:
+                        finished, in_flight = wait(
+                            in_flight, timeout=None if ids else poll,
+                            return_when=FIRST_COMPLETED,
+                        )
+                        done += len(finished)
+                        continue
+                    if options['burst']:
+                        break
+                    time.sleep(poll)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Выполнено задач: {done}')
@@ -0,0 +1,213 @@
+"""Метрики производительности запросов.
+
+Во время запроса показатели копятся в RequestMetrics текущего
+контекста: SQL, рендер шаблонов, попадания в кеш. По завершении они
+складываются в гистограммы по имени URL внутри процесса и раз в
+PERFORMANCE_FLUSH_INTERVAL секунд сбрасываются в общий кеш через incr,
+откуда их читает команда perf_report.
+"""
+import contextvars
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Верхние границы корзин гистограммы времени ответа, мс.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+FIELDS = (
+    'count', 'total_us', 'db_us', 'queries', 'template_us',
+    'cache_hits', 'cache_misses',
+)
+BUCKET_FIELDS = tuple(
+    f'bucket{index}' for index in range(len(BUCKETS_MS) + 1)
+)
+NAMES_KEY = 'perf:names'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def stop(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing."""
+        return ', '.join((
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"',
+        ))
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_query(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_time += duration
+
+
+def record_cache(hits=0, misses=0):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+@contextmanager
+def template_timer():
+    """Время рендера; вложенные рендеры (карточки внутри страницы)
+    входят во внешний и второй раз не считаются."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - started
+
+
+def _bucket(total):
+    milliseconds = total * 1000
+    for index, bound in enumerate(BUCKETS_MS):
+        if milliseconds <= bound:
+            return index
+    return len(BUCKETS_MS)
+
+
+def _key(name, field):
+    return f'perf:{name}:{field}'
+
+
+class Aggregator:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = defaultdict(Counter)
+        self.flushed = time.monotonic()
+
+    def add(self, name, metrics):
+        with self.lock:
+            counter = self.data[name]
+            counter['count'] += 1
+            counter['total_us'] += int(metrics.total * 1e6)
+            counter['db_us'] += int(metrics.db_time * 1e6)
+            counter['queries'] += metrics.queries
+            counter['template_us'] += int(metrics.template_time * 1e6)
+            counter['cache_hits'] += metrics.cache_hits
+            counter['cache_misses'] += metrics.cache_misses
+            counter[BUCKET_FIELDS[_bucket(metrics.total)]] += 1
+            due = (
+                time.monotonic() - self.flushed
+                >= settings.PERFORMANCE_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            data, self.data = self.data, defaultdict(Counter)
+            self.flushed = time.monotonic()
+        if not data:
+            return
+        names = cache.get(NAMES_KEY) or set()
+        if not names.issuperset(data):
+            cache.set(NAMES_KEY, names | set(data), None)
+        for name, counter in data.items():
+            for field, value in counter.items():
+                key = _key(name, field)
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    if not cache.add(key, value, None):
+                        cache.incr(key, value)
+
+
+aggregator = Aggregator()
+
+
+def _percentile(buckets, count, quantile):
+    threshold = count * quantile
+    seen = 0
+    for index, value in enumerate(buckets):
+        seen += value
+        if seen >= threshold:
+            if index < len(BUCKETS_MS):
+                return BUCKETS_MS[index]
+            return float('inf')
+    return None
+
+
+def snapshot():
+    """Сводка по именам URL: число запросов, средние и перцентили.
+
+    Перцентили — верхние границы корзин гистограммы, то есть оценка
+    сверху.
+    """
+    report = {}
+    for name in sorted(cache.get(NAMES_KEY) or ()):
+        fields = FIELDS + BUCKET_FIELDS
+        values = cache.get_many([_key(name, field) for field in fields])
+        data = {
+            field: values.get(_key(name, field), 0) for field in fields
+        }
+        count = data['count']
+        if not count:
+            continue
+        buckets = [data[field] for field in BUCKET_FIELDS]
+        lookups = data['cache_hits'] + data['cache_misses']
+        report[name] = {
+            'count': count,
+            'avg_ms': data['total_us'] / count / 1000,
+            'p50_ms': _percentile(buckets, count, 0.5),
+            'p95_ms': _percentile(buckets, count, 0.95),
+            'p99_ms': _percentile(buckets, count, 0.99),
+            'queries': data['queries'] / count,
+            'db_ms': data['db_us'] / count / 1000,
+            'template_ms': data['template_us'] / count / 1000,
+            'cache_hit_ratio': (
+                data['cache_hits'] / lookups if lookups else None
+            ),
+        }
+    return report
+
+
+def reset():
+    names = cache.get(NAMES_KEY) or ()
+    cache.delete_many([
+        _key(name, field)
+        for name in names for field in FIELDS + BUCKET_FIELDS
+    ])
+    cache.delete(NAMES_KEY)
@@ -0,0 +1,51 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics
+
+UNRESOLVED = '<unresolved>'
+
+
+def _timed_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.perf_counter() - started)
+
+
+class PerformanceMiddleware:
+    """Меряет время ответа, SQL, шаблоны и кеш каждого запроса.
+
+    Итог складывается в гистограммы по имени URL (core.metrics) и, при
+    PERFORMANCE_SERVER_TIMING или для персонала, отдаётся заголовком
+    Server-Timing, который видно во вкладке Network браузера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_timed_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish(token)
+        request_metrics.stop()
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else UNRESOLVED
+        metrics.aggregator.add(name, request_metrics)
+        user = getattr(request, 'user', None)
+        if settings.PERFORMANCE_SERVER_TIMING or (
+            user is not None and user.is_staff
+        ):
+            response['Server-Timing'] = request_metrics.server_timing()
+        return response
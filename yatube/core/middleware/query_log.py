@@ -0,0 +1,28 @@
+import os
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core.query_log import RequestQueryLog
+
+
+class QueryLogMiddleware:
+    """Пишет медленные и повторяющиеся SQL выборки запросов в журнал
+    (core.query_log)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        os.makedirs(os.path.dirname(settings.QUERY_LOG_FILE), exist_ok=True)
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_LOG_SAMPLE_RATE:
+            return self.get_response(request)
+        query_log = RequestQueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            response = self.get_response(request)
+        query_log.write(request)
+        return response
@@ -0,0 +1,23 @@
+from core.db import replicas
+
+
+class ReplicaMiddleware:
+    """Состояние чтения с реплик на время запроса.
+
+    Если запрос что-то записал, клиент получает cookie и следующие
+    REPLICA_PIN_SECONDS секунд читает только primary, то есть сразу
+    видит свою запись, даже если реплика ещё её не получила.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state, token = replicas.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.finish(token)
+        if state.wrote:
+            replicas.pin(response)
+        return response
@@ -0,0 +1,157 @@
+"""Журнал медленных и повторяющихся SQL-запросов.
+
+Для выборки запросов (QUERY_LOG_SAMPLE_RATE) каждый SQL сверяется с
+порогом QUERY_LOG_SLOW_MS, а одинаковые с точностью до параметров
+запросы считаются; повторённый больше QUERY_LOG_DUPLICATE_THRESHOLD
+раз — типичный N+1 из шаблона. Для таких запросов запоминается место
+вызова: строка кода проекта и узел шаблона, если запрос пришёл из
+рендера. Записи пишутся в логгер core.query_log одной строкой JSON,
+файл и ротацию задаёт LOGGING.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.template.base import Node
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SLOW = 'slow'
+DUPLICATE = 'duplicate'
+
+PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+# Кадры самих замеров пропускаются при поиске места вызова.
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+SKIPPED = (
+    os.path.abspath(__file__),
+    os.path.join(CORE_DIR, 'middleware'),
+    os.path.join(CORE_DIR, 'template_backends.py'),
+)
+
+
+def fingerprint(sql):
+    """SQL без различий в числе параметров IN (...) и пробелах."""
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def _project_file(filename):
+    filename = os.path.abspath(filename)
+    if not filename.startswith(str(settings.BASE_DIR)):
+        return False
+    if 'site-packages' in filename:
+        return False
+    return not filename.startswith(SKIPPED)
+
+
+def find_origin():
+    """Ближайшие к запросу строка кода проекта и узел шаблона."""
+    origin = {}
+    frame = sys._getframe(1)
+    while frame is not None and len(origin) < 2:
+        if 'template' not in origin:
+            node = frame.f_locals.get('self')
+            if isinstance(node, Node) and getattr(node, 'origin', None):
+                origin['template'] = {
+                    'name': node.origin.template_name,
+                    'line': node.token.lineno,
+                }
+        code = frame.f_code
+        if 'code' not in origin and _project_file(code.co_filename):
+            origin['code'] = {
+                'file': os.path.relpath(
+                    code.co_filename, str(settings.BASE_DIR)
+                ),
+                'line': frame.f_lineno,
+                'function': code.co_name,
+            }
+        frame = frame.f_back
+    return origin
+
+
+class RequestQueryLog:
+    """Счётчики и находки по SQL одного запроса."""
+
+    def __init__(self):
+        self.seen = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, duration):
+        key = fingerprint(sql)
+        entry = self.seen.get(key)
+        if entry is None:
+            entry = self.seen[key] = {'count': 0, 'time': 0.0}
+        entry['count'] += 1
+        entry['time'] += duration
+        # Место вызова снимается один раз, на пороге повторов: обход
+        # стека на каждом запросе стоил бы дороже самих запросов.
+        if entry['count'] == settings.QUERY_LOG_DUPLICATE_THRESHOLD + 1:
+            entry['origin'] = find_origin()
+        if duration * 1000 >= settings.QUERY_LOG_SLOW_MS:
+            self.slow.append({
+                'sql': key,
+                'duration_ms': round(duration * 1000, 2),
+                'origin': find_origin(),
+            })
+
+    def records(self):
+        for finding in self.slow:
+            yield dict(finding, kind=SLOW)
+        for key, entry in self.seen.items():
+            if entry['count'] > settings.QUERY_LOG_DUPLICATE_THRESHOLD:
+                yield {
+                    'kind': DUPLICATE,
+                    'sql': key,
+                    'count': entry['count'],
+                    'duration_ms': round(entry['time'] * 1000, 2),
+                    'origin': entry.get('origin', {}),
+                }
+
+    def write(self, request):
+        match = getattr(request, 'resolver_match', None)
+        common = {
+            'time': timezone.now().isoformat(),
+            'view': match.view_name if match else None,
+            'path': request.path,
+        }
+        for record in self.records():
+            logger.info(
+                json.dumps(dict(common, **record), ensure_ascii=False)
+            )
+
+
+def log_files(path):
+    """Файл журнала и его ротированные копии, от старых к новым."""
+    names = []
+    index = 1
+    while os.path.exists(f'{path}.{index}'):
+        names.append(f'{path}.{index}')
+        index += 1
+    names.reverse()
+    if os.path.exists(path):
+        names.append(path)
+    return names
+
+
+def read(path):
+    for name in log_files(path):
+        with open(name, encoding='utf-8') as log_file:
+            for line in log_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
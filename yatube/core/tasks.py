@@ -0,0 +1,210 @@
+"""Фоновые задачи: очередь в базе, локальный пул и manage.py runworker.
+
+Задача — функция модуля, помеченная @task. enqueue() откладывает
+постановку до фиксации транзакции (transaction.on_commit): при откате
+задачи не будет, а воркер не увидит строк, которых ещё нет. Задача
+ложится строкой Task, после чего её забирает локальный пул процесса
+(TASKS_LOCAL_WORKERS потоков) или отдельный manage.py runworker.
+
+Задачи должны быть идемпотентны: после сбоя воркера задача с истёкшей
+арендой (TASKS_LEASE) выполнится повторно, а упавшая — повторится с
+растущей паузой, пока не кончатся попытки. Ключ идемпотентности не
+даёт поставить одну и ту же задачу дважды.
+
+С TASKS_ALWAYS_EAGER (по умолчанию = DEBUG) задача выполняется сразу
+при вызове enqueue(), в том же потоке, как с task_always_eager в
+Celery: в разработке и тестах не нужен воркер.
+"""
+import json
+import logging
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+ERROR_MAX_LENGTH = 5000
+
+
+def task(max_attempts=None):
+    """Делает функцию задачей: func.enqueue(*args, key=None, delay=None).
+
+    Аргументы задачи должны сериализоваться в JSON, поэтому передаются
+    id объектов, а не сами объекты.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.enqueue = partial(enqueue, func)
+        return func
+    return decorator
+
+
+def enqueue(func, *args, key=None, delay=None):
+    if settings.TASKS_ALWAYS_EAGER:
+        func(*args)
+        return
+    transaction.on_commit(partial(
+        push, func.task_name, args, key=key, delay=delay,
+        max_attempts=func.max_attempts,
+    ))
+
+
+def push(name, args, key=None, delay=None, max_attempts=None):
+    """Кладёт задачу в очередь сразу; задача с занятым ключом
+    пропускается."""
+    run_after = timezone.now()
+    if delay:
+        run_after += timedelta(seconds=delay)
+    Task.objects.bulk_create([Task(
+        name=name, args=json.dumps(list(args)), key=key,
+        run_after=run_after,
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+    )], ignore_conflicts=True)
+    local_pool.kick()
+
+
+def resolve(name):
+    func = import_string(name)
+    if getattr(func, 'task_name', None) != name:
+        raise ValueError(f'{name} не задача')
+    return func
+
+
+def _due(now):
+    return (
+        Q(status=Task.QUEUED, run_after__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(limit, worker_id=None):
+    """Берёт до limit готовых задач в аренду на TASKS_LEASE секунд.
+
+    Два запроса на партию: UPDATE помечает задачи своей меткой, и
+    только если они всё ещё свободны, так что два воркера одну задачу
+    не получат; SELECT по метке возвращает доставшиеся.
+    """
+    now = timezone.now()
+    due = Task.objects.filter(_due(now)).order_by('run_after', 'pk')
+    ids = list(due.values_list('pk', flat=True)[:limit])
+    if not ids:
+        return []
+    token = f'{worker_id or os.getpid()}:{uuid.uuid4().hex[:12]}'
+    Task.objects.filter(_due(now), pk__in=ids).update(
+        status=Task.RUNNING, locked_by=token,
+        locked_until=now + timedelta(seconds=settings.TASKS_LEASE),
+        attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(
+        locked_by=token, status=Task.RUNNING
+    ).order_by('run_after', 'pk').values_list('pk', flat=True))
+
+
+def execute(task_id):
+    """Выполняет взятую задачу и записывает итог."""
+    task = Task.objects.filter(pk=task_id, status=Task.RUNNING).first()
+    if task is None:
+        return
+    try:
+        if task.attempts > task.max_attempts:
+            raise RuntimeError('Аренда истекала слишком много раз')
+        resolve(task.name)(*json.loads(task.args))
+    except Exception:
+        _failed(task, traceback.format_exc())
+    else:
+        Task.objects.filter(pk=task.pk, locked_by=task.locked_by).update(
+            status=Task.DONE, finished=timezone.now(), locked_until=None,
+        )
+
+
+def _failed(task, error):
+    logger.warning('Задача %s #%s упала:\n%s', task.name, task.pk, error)
+    now = timezone.now()
+    update = {'locked_until': None, 'last_error': error[-ERROR_MAX_LENGTH:]}
+    if task.attempts >= task.max_attempts:
+        update.update(status=Task.FAILED, finished=now)
+    else:
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+        update.update(
+            status=Task.QUEUED, run_after=now + timedelta(seconds=delay)
+        )
+    Task.objects.filter(pk=task.pk, locked_by=task.locked_by).update(
+        **update
+    )
+
+
+def execute_in_worker(task_id):
+    close_old_connections()
+    try:
+        execute(task_id)
+    except Exception:
+        logger.exception('Задача #%s не записала итог', task_id)
+    finally:
+        close_old_connections()
+
+
+def purge():
+    """Удаляет выполненные задачи старше TASKS_KEEP_DONE секунд."""
+    border = timezone.now() - timedelta(seconds=settings.TASKS_KEEP_DONE)
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, finished__lt=border
+    ).delete()
+    return deleted
+
+
+class LocalPool:
+    """Потоки веб-процесса, которые разбирают очередь после коммитов.
+
+    Не больше TASKS_LOCAL_WORKERS разборов одновременно: лишний толчок,
+    пока все заняты, ничего не добавит — занятые и так дочитают очередь.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.running = 0
+
+    def kick(self):
+        workers = settings.TASKS_LOCAL_WORKERS
+        if not workers:
+            return
+        with self.lock:
+            if self.running >= workers:
+                return
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix='tasks',
+                )
+            self.running += 1
+        self.executor.submit(self.drain)
+
+    def drain(self):
+        try:
+            while True:
+                close_old_connections()
+                ids = claim(1)
+                if not ids:
+                    return
+                execute_in_worker(ids[0])
+        except Exception:
+            logger.exception('Локальный разбор очереди прерван')
+        finally:
+            close_old_connections()
+            with self.lock:
+                self.running -= 1
+
+
+local_pool = LocalPool()
@@ -0,0 +1,24 @@
+"""Шаблонный бэкенд Django с замером времени рендера.
+
+Подключается в TEMPLATES вместо DjangoTemplates; время попадает в
+метрики запроса (core.metrics) и в заголовок Server-Timing.
+"""
+from django.template.backends.django import DjangoTemplates, Template
+
+from core import metrics
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with metrics.template_timer():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        template = super().from_string(template_code)
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
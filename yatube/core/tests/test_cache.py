@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.contrib.auth.models import AnonymousUser
+
+from core.cache import LOCK_SUFFIX, fetch, stampede_cache_page
+
+
+class StampedeCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_value_is_cached(self):
+        """Значение считается один раз до истечения срока"""
+        self.assertEqual(fetch('key', self.compute, 60), 1)
+        self.assertEqual(fetch('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_served_while_locked(self):
+        """Пока другой процесс пересчитывает, отдаётся старая копия"""
+        cache.set('key', {'value': 'stale', 'delta': 0, 'expires': 0})
+        cache.add('key' + LOCK_SUFFIX, 1)
+        self.assertEqual(fetch('key', self.compute, 60), 'stale')
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_value_is_recomputed(self):
+        """Просроченное значение пересчитывает держатель блокировки"""
+        cache.set('key', {'value': 'stale', 'delta': 0, 'expires': 0})
+        self.assertEqual(fetch('key', self.compute, 60), 1)
+        self.assertFalse(cache.get('key' + LOCK_SUFFIX))
+
+    def test_page_decorator_skips_errors(self):
+        """Страницы с ошибкой не кешируются"""
+        statuses = [404, 200, 500]
+
+        @stampede_cache_page(60, key_prefix='test')
+        def view(request):
+            self.calls += 1
+            return HttpResponse(status=statuses[self.calls - 1])
+
+        request = RequestFactory().get('/page/')
+        request.user = AnonymousUser()
+        self.assertEqual(view(request).status_code, 404)
+        self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(
+    PERFORMANCE_SERVER_TIMING=True, PERFORMANCE_FLUSH_INTERVAL=0
+)
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Measured')
+        Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ несёт Server-Timing с временем, SQL и шаблонами"""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+        self.assertNotIn('desc="0 queries"', timing)
+
+    def test_histograms_per_url_name(self):
+        """Метрики копятся по имени URL и видны в отчёте"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        report = metrics.snapshot()
+        self.assertEqual(report['posts:index']['count'], 2)
+        self.assertEqual(report['posts:profile']['count'], 1)
+        self.assertGreater(report['posts:profile']['queries'], 0)
+        self.assertGreater(report['posts:profile']['template_ms'], 0)
+        out = StringIO()
+        call_command('perf_report', '--reset', stdout=out)
+        self.assertIn('posts:profile', out.getvalue())
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_admin_page_for_staff_only(self):
+        """Страница метрик доступна только персоналу"""
+        url = reverse('performance')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='Staff', is_staff=True)
+        self.client.force_login(staff)
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(url)
+        self.assertContains(response, 'posts:index')
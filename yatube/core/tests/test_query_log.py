@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from contextlib import ExitStack
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from core.query_log import DUPLICATE, SLOW, RequestQueryLog, fingerprint
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_LOG_DUPLICATE_THRESHOLD=2, QUERY_LOG_SLOW_MS=1e6)
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        post = Post.objects.create(
+            text='Пост', author=User.objects.create_user(username='Logged')
+        )
+        for number in range(4):
+            Comment.objects.create(
+                post=post, text='Комментарий',
+                author=User.objects.create_user(
+                    username=f'Commenter{number}'
+                ),
+            )
+
+    def capture(self, func):
+        query_log = RequestQueryLog()
+        with ExitStack() as stack:
+            stack.enter_context(connection.execute_wrapper(query_log))
+            func()
+        return list(query_log.records())
+
+    def test_fingerprint_ignores_in_list_length(self):
+        """Списки параметров IN разной длины дают один отпечаток"""
+        self.assertEqual(
+            fingerprint('SELECT 1 WHERE id IN (%s, %s)'),
+            fingerprint('SELECT  1 WHERE id IN (%s)'),
+        )
+
+    def test_duplicate_in_code(self):
+        """N+1 в коде находится вместе со строкой вызова"""
+        def n_plus_one():
+            for comment in Comment.objects.all():
+                comment.author.username
+
+        records = self.capture(n_plus_one)
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record['kind'], DUPLICATE)
+        self.assertEqual(record['count'], 4)
+        self.assertEqual(
+            record['origin']['code']['file'],
+            os.path.join('core', 'tests', 'test_query_log.py'),
+        )
+
+    def test_duplicate_in_template(self):
+        """N+1 из шаблона указывает на узел шаблона"""
+        template = Template(
+            '{% for comment in comments %}'
+            '{{ comment.author.username }}'
+            '{% endfor %}'
+        )
+        records = self.capture(lambda: template.render(
+            Context({'comments': Comment.objects.all()})
+        ))
+        self.assertIn('template', records[0]['origin'])
+
+    @override_settings(QUERY_LOG_SLOW_MS=0)
+    def test_slow_query(self):
+        """Запросы дольше порога попадают в журнал по отдельности"""
+        records = self.capture(lambda: list(Post.objects.all()))
+        self.assertEqual(records[0]['kind'], SLOW)
+
+    @override_settings(QUERY_LOG_SAMPLE_RATE=1.0)
+    def test_middleware_writes_json_lines(self):
+        """Middleware пишет находки в журнал строками JSON"""
+        with self.assertLogs('core.query_log') as logs:
+            with override_settings(QUERY_LOG_SLOW_MS=0):
+                self.client.get('/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+
+    def test_report_command(self):
+        """Команда сводки показывает худшие запросы"""
+        records = [
+            {'kind': DUPLICATE, 'sql': 'SELECT author', 'count': 20,
+             'duration_ms': 40.0, 'view': 'posts:post_detail',
+             'origin': {'template': {'name': 'comment.html', 'line': 3}}},
+            {'kind': SLOW, 'sql': 'SELECT slow', 'duration_ms': 5.0,
+             'view': 'posts:index', 'origin': {}},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queries.jsonl')
+            with open(path, 'w', encoding='utf-8') as log_file:
+                for record in records:
+                    log_file.write(json.dumps(record) + '\n')
+            out = StringIO()
+            call_command('query_log_report', file=path, stdout=out)
+        report = out.getvalue()
+        self.assertLess(
+            report.index('SELECT author'), report.index('SELECT slow')
+        )
+        self.assertIn('comment.html:3', report)
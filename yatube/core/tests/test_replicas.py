@@ -0,0 +1,141 @@
+import datetime
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.db import replicas
+from posts.models import Post
+
+User = get_user_model()
+
+REPLICA = 'replica_test'
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.state, self.token = replicas.start()
+        self.router = replicas.ReplicaRouter()
+
+    def tearDown(self):
+        replicas.finish(self.token)
+
+    def test_reads_go_to_chosen_replica(self):
+        """Модели лент читаются с выбранной реплики, прочие — нет"""
+        self.assertIsNone(self.router.db_for_read(Post))
+        self.state.replica = REPLICA
+        self.assertEqual(self.router.db_for_read(Post), REPLICA)
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_write_moves_reads_to_primary(self):
+        """После записи запрос читает только primary"""
+        self.state.replica = REPLICA
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    @override_settings(REPLICA_DATABASES=[REPLICA])
+    def test_no_migrations_on_replica(self):
+        """Миграции на реплики не применяются"""
+        self.assertFalse(self.router.allow_migrate(REPLICA, 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+@override_settings(
+    REPLICA_DATABASES=[REPLICA], REPLICA_MAX_LAG=5,
+    REPLICA_CHECK_INTERVAL=60,
+)
+class ReplicaReadsTests(TestCase):
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        # Реплика — отдельный файл со схемой тестовой базы.
+        cls.replica_dir = tempfile.mkdtemp()
+        path = os.path.join(cls.replica_dir, 'replica.sqlite3')
+        primary = connections['default']
+        with primary.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+            )
+            rows = cursor.fetchall()
+        # Служебные таблицы полнотекстового индекса создаст сам индекс.
+        virtual = tuple(
+            f'{name}_' for name, sql in rows
+            if sql.startswith('CREATE VIRTUAL TABLE')
+        )
+        schema = [sql for name, sql in rows if not name.startswith(virtual)]
+        with closing(sqlite3.connect(path)) as target:
+            for statement in schema:
+                target.execute(statement)
+            target.commit()
+        connections.databases[REPLICA] = dict(
+            primary.settings_dict, NAME=path, TEST={'NAME': path}
+        )
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='С primary', author=cls.author)
+        User.objects.using(REPLICA).bulk_create([
+            User(pk=cls.author.pk, username=cls.author.username),
+        ])
+        Post.objects.using(REPLICA).bulk_create([Post(
+            pk=cls.post.pk, text='С реплики', author_id=cls.author.pk,
+            pub_date=cls.post.pub_date,
+        )])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        replicas.health.reset()
+
+    def test_feed_read_from_replica(self):
+        """Лента читается с реплики, если та не отстала"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'С реплики')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_lagging_replica_skipped(self):
+        """Отставшая реплика пропускается, лента читается с primary"""
+        Post.objects.using(REPLICA).filter(pk=self.post.pk).update(
+            pub_date=self.post.pub_date - datetime.timedelta(minutes=1)
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'С primary')
+
+    def test_unavailable_replica_skipped(self):
+        """Недоступная реплика пропускается"""
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute('DROP TABLE posts_post')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'С primary')
+
+    def test_read_your_writes(self):
+        """Автор сразу видит свой пост, хотя реплика его ещё не получила"""
+        writer = Client()
+        writer.force_login(self.author)
+        response = writer.post(
+            reverse('posts:post_create'), {'text': 'Только что'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertContains(
+            writer.get(reverse('posts:index')), 'Только что'
+        )
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'Только что'
+        )
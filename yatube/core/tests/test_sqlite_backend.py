@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase
+
+from core.db.backends.sqlite3.base import DatabaseWrapper
+
+
+class TunedSQLiteTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'tuned.sqlite3')
+        with closing(sqlite3.connect(self.path)) as setup:
+            setup.execute('PRAGMA journal_mode = WAL')
+            setup.execute('CREATE TABLE note (text TEXT)')
+
+    def wrapper(self, **options):
+        settings_dict = dict(
+            connections['default'].settings_dict,
+            ENGINE='core.db.backends.sqlite3', NAME=self.path,
+            OPTIONS=options,
+        )
+        wrapper = DatabaseWrapper(settings_dict, alias='tuned_test')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def lock(self):
+        """Чужое соединение держит блокировку записи."""
+        other = sqlite3.connect(self.path, check_same_thread=False)
+        other.isolation_level = None
+        other.execute('BEGIN IMMEDIATE')
+        self.addCleanup(other.close)
+        return other
+
+    def test_pragmas(self):
+        """При подключении включаются WAL и synchronous=NORMAL"""
+        with closing(sqlite3.connect(self.path)) as setup:
+            setup.execute('PRAGMA journal_mode = DELETE')
+        with self.wrapper().cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_locked_write_retried(self):
+        """Запись вне транзакции дожидается снятия блокировки"""
+        other = self.lock()
+        threading.Timer(0.2, lambda: other.execute('COMMIT')).start()
+        wrapper = self.wrapper(
+            timeout=0.01, lock_retries=10, lock_retry_delay=0.05
+        )
+        with wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO note VALUES (%s)', ['после'])
+            cursor.execute('SELECT COUNT(*) FROM note')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_retries_exhausted(self):
+        """Без повторов ошибка блокировки уходит наружу"""
+        self.lock()
+        wrapper = self.wrapper(timeout=0.01, lock_retries=0)
+        with self.assertRaises(OperationalError), wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO note VALUES (%s)', ['сразу'])
+
+    def test_transaction_takes_write_lock(self):
+        """atomic() открывается BEGIN IMMEDIATE"""
+        wrapper = self.wrapper()
+        wrapper.set_autocommit(False)
+        wrapper.ensure_connection()
+        wrapper._start_transaction_under_autocommit()
+        other = sqlite3.connect(self.path, timeout=0.01)
+        self.addCleanup(other.close)
+        with self.assertRaises(sqlite3.OperationalError):
+            other.execute('BEGIN IMMEDIATE')
+        wrapper.connection.rollback()
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+CALLS = []
+
+
+@tasks.task()
+def record(value):
+    CALLS.append(value)
+
+
+@tasks.task(max_attempts=2)
+def fail(value):
+    raise ValueError(value)
+
+
+def not_a_task(value):
+    CALLS.append(value)
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False, TASKS_LOCAL_WORKERS=0)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def run_due(self):
+        for task_id in tasks.claim(10):
+            tasks.execute(task_id)
+
+    def test_task_runs_once(self):
+        """Задача из очереди выполняется и помечается выполненной"""
+        tasks.push(record.task_name, ['раз'])
+        self.run_due()
+        self.run_due()
+        self.assertEqual(CALLS, ['раз'])
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 1)
+
+    def test_idempotency_key(self):
+        """Задача с занятым ключом в очередь не встаёт"""
+        tasks.push(record.task_name, ['раз'], key='record:1')
+        tasks.push(record.task_name, ['два'], key='record:1')
+        self.run_due()
+        self.assertEqual(CALLS, ['раз'])
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется с паузой, потом считается
+        невыполненной"""
+        tasks.push(fail.task_name, ['ошибка'], max_attempts=2)
+        self.run_due()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertGreater(task.run_after, timezone.now())
+        self.assertIn('ValueError: ошибка', task.last_error)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(run_after=timezone.now())
+        self.run_due()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    def test_expired_lease_reclaimed(self):
+        """Задачу упавшего воркера забирает другой после аренды"""
+        tasks.push(record.task_name, ['раз'])
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.run_due()
+        self.assertEqual(CALLS, ['раз'])
+
+    def test_only_tasks_run(self):
+        """Строка очереди не может вызвать произвольную функцию"""
+        tasks.push(f'{__name__}.not_a_task', ['раз'], max_attempts=1)
+        self.run_due()
+        self.assertEqual(CALLS, [])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager(self):
+        """В режиме eager задача выполняется сразу, без очереди"""
+        record.enqueue('сразу')
+        self.assertEqual(CALLS, ['сразу'])
+        self.assertFalse(Task.objects.exists())
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False, TASKS_LOCAL_WORKERS=0)
+class TaskOnCommitTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueued_after_commit(self):
+        """Задача встаёт в очередь только после фиксации транзакции"""
+        with transaction.atomic():
+            record.enqueue('после', key='commit')
+            self.assertFalse(Task.objects.exists())
+        self.assertTrue(Task.objects.filter(key='commit').exists())
+
+    def test_not_enqueued_on_rollback(self):
+        """При откате транзакции задачи нет"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            record.enqueue('откат')
+            raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_runworker_burst(self):
+        """runworker --burst выполняет готовые задачи и выходит"""
+        for value in range(5):
+            tasks.push(record.task_name, [value])
+        out = StringIO()
+        call_command('runworker', '--burst', '--threads', '1', stdout=out)
+        self.assertEqual(sorted(CALLS), list(range(5)))
+        self.assertIn('Выполнено задач: 5', out.getvalue())
@@ -1,5 +1,8 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
 
+from core import metrics
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -9,3 +12,18 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def performance(request):
+    """Метрики запросов по именам URL для персонала."""
+    metrics.aggregator.flush()
+    context = {
+        'title': 'Производительность',
+        'report': sorted(
+            metrics.snapshot().items(),
+            key=lambda item: item[1]['avg_ms'],
+            reverse=True,
+        ),
+    }
+    return render(request, 'core/performance.html', context)
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'kind', 'actor', 'post', 'read',
+                    'created')
+    list_filter = ('kind', 'read', 'emailed')
+    raw_id_fields = ('recipient', 'actor', 'post', 'comment')
+
+
+admin.site.register(Notification, NotificationAdmin)
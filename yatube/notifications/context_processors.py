@@ -0,0 +1,11 @@
+from functools import partial
+
+from .counters import unread_count
+
+
+def unread(request):
+    """Число непрочитанных уведомлений для значка в шапке. Шаблон
+    вызывает функцию сам, так что страницы без шапки кеш не трогают."""
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_notifications': partial(unread_count, request.user.pk)}
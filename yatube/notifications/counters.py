@@ -0,0 +1,76 @@
+"""Счётчик непрочитанных уведомлений для значка в шапке.
+
+Число хранится в Profile.unread_notifications и меняется F()-выражением
+одним UPDATE на партию получателей, а значок читает его из кеша: на
+странице нет ни COUNT(*), ни даже запроса к профилю, пока ключ жив.
+Ключ сбрасывается сразу и ещё раз после фиксации транзакции, как у
+posts.follows.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Profile
+
+from .models import Notification
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    key = _key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Profile.objects.filter(user_id=user_id).values_list(
+            'unread_notifications', flat=True
+        ).first() or 0
+        cache.set(key, count, settings.NOTIFICATIONS_UNREAD_TIMEOUT)
+    return count
+
+
+def stamp(request):
+    """Часть личной метки страницы (CONDITIONAL_PERSONAL_STAMPS): значок
+    в шапке меняет страницу."""
+    if not request.user.is_authenticated:
+        return None
+    return unread_count(request.user.pk)
+
+
+def invalidate(user_ids):
+    keys = [_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def add_unread(user_ids):
+    Profile.objects.filter(user_id__in=user_ids).update(
+        unread_notifications=F('unread_notifications') + 1
+    )
+    invalidate(user_ids)
+
+
+def reconcile(user_ids):
+    """Пересчитывает счётчики по таблице уведомлений."""
+    unread = Notification.objects.filter(
+        recipient_id=OuterRef('user_id'), read=False
+    ).order_by().values('recipient_id').annotate(
+        total=Count('pk')
+    ).values('total')
+    Profile.objects.filter(user_id__in=user_ids).update(
+        unread_notifications=Coalesce(Subquery(unread), 0)
+    )
+    invalidate(user_ids)
+
+
+@transaction.atomic
+def mark_all_read(user_id):
+    Notification.objects.filter(recipient_id=user_id, read=False).update(
+        read=True
+    )
+    # Пересчёт, а не обнуление: уведомление, пришедшее между двумя
+    # UPDATE, останется в счётчике.
+    reconcile([user_id])
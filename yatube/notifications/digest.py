@@ -0,0 +1,64 @@
+"""Письма-дайджесты: одно письмо на пользователя со всеми его
+непрочитанными уведомлениями, которые ещё не уходили почтой.
+
+Получатели обрабатываются партиями по NOTIFICATIONS_DIGEST_BATCH_SIZE:
+на партию — один запрос за уведомлениями, одна отправка через
+соединение EMAIL_BACKEND и один UPDATE отметок об отправке.
+"""
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+
+from .models import Notification
+
+
+def pending():
+    return Notification.objects.filter(emailed=False, read=False).exclude(
+        recipient__email=''
+    )
+
+
+def _message(recipient, notifications):
+    limit = settings.NOTIFICATIONS_DIGEST_LIMIT
+    body = render_to_string('notifications/digest.txt', {
+        'recipient': recipient,
+        'notifications': notifications[:limit],
+        'more': max(len(notifications) - limit, 0),
+    })
+    return EmailMessage(
+        f'Yatube: новых уведомлений — {len(notifications)}',
+        body,
+        to=[recipient.email],
+    )
+
+
+def send_digests():
+    """Отправляет дайджесты, возвращает число писем."""
+    batch_size = settings.NOTIFICATIONS_DIGEST_BATCH_SIZE
+    recipient_ids = pending().order_by('recipient_id').values_list(
+        'recipient_id', flat=True
+    ).distinct()
+    recipient_ids = iter(list(recipient_ids))
+    connection = get_connection()
+    sent = 0
+    while True:
+        chunk = list(islice(recipient_ids, batch_size))
+        if not chunk:
+            return sent
+        notifications = pending().filter(
+            recipient_id__in=chunk
+        ).select_related('recipient', 'actor', 'post').order_by(
+            'recipient_id', '-id'
+        )
+        messages = []
+        ids = []
+        for recipient, group in groupby(
+            notifications, key=lambda notification: notification.recipient
+        ):
+            group = list(group)
+            messages.append(_message(recipient, group))
+            ids.extend(notification.pk for notification in group)
+        sent += connection.send_messages(messages) or 0
+        Notification.objects.filter(pk__in=ids).update(emailed=True)
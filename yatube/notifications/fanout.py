@@ -0,0 +1,88 @@
+"""Раздача уведомлений о новых постах и комментариях.
+
+Сигналы ставят фоновую задачу (core.tasks) после коммита поста или
+комментария. Получатели идут партиями по NOTIFICATIONS_BATCH_SIZE:
+подписчики автора читаются по ключу (pk > последнего), а каждая партия
+— одна транзакция из bulk_create и одного UPDATE счётчиков. Повтор
+задачи после сбоя на середине не дублирует уведомления: уже получившие
+в партии отсеиваются одним запросом.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from core.tasks import task
+from posts import bulk
+from posts.models import Comment, Follow, Post
+
+from . import counters
+from .models import Notification
+
+
+def _followers(author_id, batch_size):
+    last = 0
+    while True:
+        rows = list(
+            Follow.objects.filter(author_id=author_id, pk__gt=last)
+            .order_by('pk').values_list('pk', 'user_id')[:batch_size]
+        )
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield from (user_id for _, user_id in rows)
+
+
+def deliver(kind, actor_id, post_id, recipient_ids, comment_id=None):
+    """Создаёт уведомления партиями, возвращает их число."""
+    batch_size = settings.NOTIFICATIONS_BATCH_SIZE
+    recipient_ids = iter(recipient_ids)
+    delivered = 0
+    while True:
+        chunk = list(islice(recipient_ids, batch_size))
+        if not chunk:
+            return delivered
+        with transaction.atomic():
+            done = set(Notification.objects.filter(
+                kind=kind, post_id=post_id, comment_id=comment_id,
+                recipient_id__in=chunk,
+            ).values_list('recipient_id', flat=True))
+            fresh = [
+                user_id for user_id in chunk
+                if user_id not in done and user_id != actor_id
+            ]
+            Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=user_id, actor_id=actor_id, kind=kind,
+                    post_id=post_id, comment_id=comment_id,
+                )
+                for user_id in fresh
+            ], batch_size=bulk.batch_size(Notification, batch_size))
+            counters.add_unread(fresh)
+        delivered += len(fresh)
+
+
+@task()
+def notify_post(post_id):
+    """Новый пост — подписчикам автора."""
+    post = Post.objects.only('author_id').filter(pk=post_id).first()
+    if post is None:
+        return
+    deliver(
+        Notification.POST, post.author_id, post.pk,
+        _followers(post.author_id, settings.NOTIFICATIONS_BATCH_SIZE),
+    )
+
+
+@task()
+def notify_comment(comment_id):
+    """Новый комментарий — автору поста."""
+    comment = Comment.objects.select_related('post').only(
+        'author_id', 'post__author_id'
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    deliver(
+        Notification.COMMENT, comment.author_id, comment.post_id,
+        [comment.post.author_id], comment_id=comment.pk,
+    )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from notifications.digest import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает дайджесты непрочитанных уведомлений: одно письмо на '
+        'пользователя. Запускается по расписанию (cron).'
+    )
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
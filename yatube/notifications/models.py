@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from core.models import CreatedModel
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class Notification(CreatedModel):
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Новый пост автора из подписок'),
+        (COMMENT, 'Комментарий к посту'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Кто написал',
+    )
+    kind = models.CharField('Вид', max_length=10, choices=KINDS)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Комментарий',
+    )
+    read = models.BooleanField('Прочитано', default=False)
+    emailed = models.BooleanField('Отправлено в дайджесте', default=False)
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(
+                fields=['recipient', '-id'],
+                name='notification_recipient_idx',
+            ),
+            models.Index(
+                fields=['post', 'kind'], name='notification_post_idx'
+            ),
+            models.Index(
+                fields=['emailed', 'read'], name='notification_digest_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.recipient}'
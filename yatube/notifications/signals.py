@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from posts.models import Comment, Post
+
+from . import counters, fanout
+from .models import Notification
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fanout.notify_post.enqueue(
+            instance.pk, key=f'notifications:post:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fanout.notify_comment.enqueue(
+            instance.pk, key=f'notifications:comment:{instance.pk}'
+        )
+
+
+# Уведомления удаляются каскадом вместе с постом или комментарием, и
+# счётчики их получателей нужно пересчитать.
+
+@receiver(pre_delete, sender=Post)
+@receiver(pre_delete, sender=Comment)
+def remember_recipients(sender, instance, **kwargs):
+    field = 'post' if sender is Post else 'comment'
+    instance._unread_recipients = set(Notification.objects.filter(
+        **{field: instance}, read=False
+    ).values_list('recipient_id', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def reconcile_recipients(sender, instance, **kwargs):
+    recipients = getattr(instance, '_unread_recipients', None)
+    if recipients:
+        counters.reconcile(recipients)
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notifications import counters, digest, fanout
+from notifications.models import Notification
+from posts.models import Comment, Follow, Post
+from users.models import Profile
+
+User = get_user_model()
+
+
+def unread(user):
+    return Profile.objects.get(user=user).unread_notifications
+
+
+@override_settings(TASKS_ALWAYS_EAGER=True, NOTIFICATIONS_BATCH_SIZE=2)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@yatube.ru'
+        )
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{index}', email=f'reader{index}@yatube.ru'
+            )
+            for index in range(4)
+        ]
+        cls.silent = User.objects.create_user(username='silent')
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author)
+            for user in cls.readers + [cls.silent]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.readers[0])
+
+    def test_post_fans_out_to_followers(self):
+        """Новый пост уведомляет каждого подписчика ровно один раз"""
+        post = Post.objects.create(author=self.author, text='Новость')
+        fanout.notify_post(post.pk)
+        self.assertEqual(
+            Notification.objects.filter(post=post).count(),
+            len(self.readers) + 1,
+        )
+        for reader in self.readers:
+            self.assertEqual(unread(reader), 1)
+        self.assertEqual(unread(self.author), 0)
+
+    def test_comment_notifies_post_author(self):
+        """Комментарий уведомляет автора поста, но не о своём же"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.readers[0], text='Да')
+        Comment.objects.create(post=post, author=self.author, text='Сам')
+        self.assertEqual(
+            Notification.objects.filter(
+                recipient=self.author, kind=Notification.COMMENT
+            ).count(),
+            1,
+        )
+        self.assertEqual(unread(self.author), 1)
+
+    def test_badge_is_cached(self):
+        """Значок в шапке читается из кеша и сбрасывается при раздаче"""
+        reader = self.readers[0]
+        self.assertEqual(counters.unread_count(reader.pk), 0)
+        with self.assertNumQueries(0):
+            counters.unread_count(reader.pk)
+        Post.objects.create(author=self.author, text='Новость')
+        self.assertEqual(counters.unread_count(reader.pk), 1)
+        response = self.client.get(reverse('notifications:index'))
+        self.assertContains(response, 'badge')
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_mark_read(self):
+        """Отметка «прочитано» обнуляет счётчик"""
+        Post.objects.create(author=self.author, text='Новость')
+        response = self.client.post(reverse('notifications:mark_read'))
+        self.assertRedirects(response, reverse('notifications:index'))
+        self.assertEqual(unread(self.readers[0]), 0)
+        self.assertEqual(counters.unread_count(self.readers[0].pk), 0)
+        self.assertEqual(unread(self.readers[1]), 1)
+
+    def test_delete_reconciles(self):
+        """Удаление поста пересчитывает счётчики получателей"""
+        post = Post.objects.create(author=self.author, text='Новость')
+        post.delete()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(unread(self.readers[0]), 0)
+
+    def test_digest(self):
+        """Дайджест — одно письмо на пользователя с почтой, без повторов"""
+        Post.objects.create(author=self.author, text='Первый')
+        Post.objects.create(author=self.author, text='Второй')
+        self.assertEqual(digest.send_digests(), len(self.readers))
+        self.assertEqual(len(mail.outbox), len(self.readers))
+        self.assertIn('Второй', mail.outbox[0].body)
+        self.assertEqual(digest.send_digests(), 0)
+        self.assertEqual(len(mail.outbox), len(self.readers))
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
+
+from posts.paginator import CursorPaginator
+
+from . import counters
+from .models import Notification
+
+
+@login_required
+def index(request):
+    notifications = Notification.objects.filter(
+        recipient=request.user
+    ).select_related('actor', 'post').order_by('-id')
+    paginator = CursorPaginator(
+        notifications, settings.NOTIFICATIONS_AMOUNT, ordering=('-id',)
+    )
+    context = {
+        'page_obj': paginator.get_page(request.GET.get('cursor')),
+    }
+    return render(request, 'notifications/index.html', context)
+
+
+@login_required
+@require_POST
+def mark_read(request):
+    counters.mark_all_read(request.user.pk)
+    return redirect('notifications:index')
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 
 from .models import Post, Group
+from .search import get_backend
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,6 +12,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идёт по индексу, а не LIKE-сканом по search_fields.
+        if not search_term:
+            return queryset, False
+        hits = get_backend().search(
+            search_term, settings.SEARCH_ADMIN_LIMIT
+        )
+        return queryset.filter(pk__in=[pk for pk, _ in hits]), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
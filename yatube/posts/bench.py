@@ -0,0 +1,267 @@
+"""Замеры лент для manage.py bench.
+
+Каждый сценарий — один запрос к представлению. Его гоняют либо
+тестовым клиентом по одному, считая SQL и пиковую память, либо
+нагрузкой: потоки бьют по настоящему WSGI-серверу, а число SQL берётся
+из заголовка Server-Timing (core.middleware.performance).
+"""
+import re
+import statistics
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+MEMORY_SAMPLES = 5
+
+
+class Scenario:
+    def __init__(self, name, url, method='get', data=None, user=None):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.user = user
+
+
+def scenarios():
+    """Сценарии на самых нагруженных объектах базы."""
+    group = Group.objects.annotate(total=Count('posts')).order_by(
+        '-total'
+    ).first()
+    author = User.objects.order_by('-profile__posts_count').first()
+    post = Post.objects.order_by('-comments_count', '-pk').first()
+    reader = User.objects.order_by('-profile__following_count').first()
+    if None in (group, author, post, reader):
+        raise ValueError('Для замеров нужны группы, посты и пользователи')
+    return [
+        Scenario('index', reverse('posts:index')),
+        Scenario(
+            'group_posts', reverse('posts:group_list', args=(group.slug,))
+        ),
+        Scenario('profile', reverse('posts:profile', args=(author,))),
+        Scenario(
+            'post_detail', reverse('posts:post_detail', args=(post.pk,))
+        ),
+        Scenario('follow_index', reverse('posts:follow_index'), user=reader),
+        Scenario(
+            'post_create', reverse('posts:post_create'), method='post',
+            data={'text': 'Замер создания поста'}, user=reader,
+        ),
+        Scenario(
+            'add_comment',
+            reverse('posts:add_comment', args=(post.pk,)), method='post',
+            data={'text': 'Замер комментария'}, user=reader,
+        ),
+    ]
+
+
+def percentile(ordered, percent):
+    """Перцентиль отсортированного списка с линейной интерполяцией, как
+    statistics.quantiles(method='inclusive'), которого нет до 3.8."""
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def summarize(latencies, queries=None):
+    latencies = sorted(latencies)
+    p50, p95, p99 = (
+        percentile(latencies, percent) for percent in (50, 95, 99)
+    )
+    summary = {
+        'requests': len(latencies),
+        'p50_ms': round(p50 * 1000, 2),
+        'p95_ms': round(p95 * 1000, 2),
+        'p99_ms': round(p99 * 1000, 2),
+    }
+    if queries:
+        summary['queries'] = round(statistics.mean(queries), 2)
+    return summary
+
+
+def run_client(scenario, requests, warmup=2, cold=None):
+    """Последовательные запросы тестовым клиентом.
+
+    cold — функция, которую вызвать перед каждым запросом (например,
+    очистка кеша), чтобы мерить промахи.
+    """
+    client = Client()
+    if scenario.user is not None:
+        client.force_login(scenario.user)
+    call = getattr(client, scenario.method)
+
+    def request():
+        if cold is not None:
+            cold()
+        response = call(scenario.url, scenario.data)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f'{scenario.name}: ответ {response.status_code}'
+            )
+
+    for _ in range(warmup):
+        request()
+    latencies = []
+    queries = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            request()
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured))
+    peak = 0
+    for _ in range(MEMORY_SAMPLES):
+        # Свой запуск трассировки на каждый замер: reset_peak() есть
+        # только с Python 3.9.
+        tracemalloc.start()
+        try:
+            request()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    summary = summarize(latencies, queries)
+    summary['peak_kb'] = round(peak / 1024)
+    return summary
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+opener = urllib.request.build_opener(NoRedirect)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class LoadServer:
+    """Многопоточный WSGI-сервер проекта на свободном порту."""
+
+    def __enter__(self):
+        self.server = make_server(
+            '127.0.0.1', 0, get_wsgi_application(),
+            server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+        )
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def _session_headers(base_url, scenario):
+    """Cookie сессии и CSRF для сценария, которому нужен вход."""
+    if scenario.user is None:
+        return {}
+    client = Client()
+    client.force_login(scenario.user)
+    cookies = SimpleCookie()
+    cookies.update(client.cookies)
+    headers = {'Cookie': cookies.output(attrs=[], header='', sep=';')}
+    if scenario.method == 'post':
+        # CSRF-cookie выдаёт страница с формой; add_comment на GET
+        # отвечает редиректом без неё.
+        request = urllib.request.Request(
+            base_url + reverse('posts:post_create'), headers=headers
+        )
+        with opener.open(request) as response:
+            for header in response.headers.get_all('Set-Cookie', ()):
+                cookies.load(header)
+        headers['Cookie'] = cookies.output(attrs=[], header='', sep=';')
+        headers['X-CSRFToken'] = cookies['csrftoken'].value
+    return headers
+
+
+def run_load(server, scenario, requests, concurrency):
+    """requests запросов в concurrency потоков по настоящему HTTP."""
+    headers = _session_headers(server.base_url, scenario)
+    data = None
+    if scenario.data is not None:
+        data = urllib.parse.urlencode(scenario.data).encode()
+
+    def request(_):
+        http_request = urllib.request.Request(
+            server.base_url + scenario.url, data=data, headers=headers,
+            method=scenario.method.upper(),
+        )
+        started = time.perf_counter()
+        try:
+            with opener.open(http_request) as response:
+                response.read()
+                timing = response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as error:
+            # Редиректы не переходим: POST отвечает 302, это успех.
+            if error.code >= 400:
+                return time.perf_counter() - started, None, error.code
+            timing = error.headers.get('Server-Timing', '')
+        elapsed = time.perf_counter() - started
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return elapsed, int(match.group(1)) if match else None, None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(requests)))
+    wall = time.perf_counter() - started
+    latencies = [elapsed for elapsed, _, _ in results]
+    queries = [count for _, count, _ in results if count is not None]
+    summary = summarize(latencies, queries)
+    summary['rps'] = round(requests / wall, 1)
+    summary['errors'] = sum(1 for _, _, error in results if error)
+    return summary
+
+
+def regressions(results, baseline, tolerance):
+    """Чем результаты хуже базовых: p95 вырос больше чем на tolerance
+    или SQL на запрос стало больше."""
+    found = []
+    for name, modes in results.items():
+        for mode, summary in modes.items():
+            base = baseline.get(name, {}).get(mode)
+            if not base:
+                continue
+            if summary['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                found.append(
+                    f'{name} [{mode}]: p95 {base["p95_ms"]} → '
+                    f'{summary["p95_ms"]} мс'
+                )
+            if summary.get('queries', 0) > base.get('queries', 0):
+                found.append(
+                    f'{name} [{mode}]: SQL на запрос {base.get("queries")} '
+                    f'→ {summary["queries"]}'
+                )
+    return found
@@ -0,0 +1,58 @@
+"""Общие приёмы массовой записи для наполнения и импорта."""
+import contextvars
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection
+
+from .models import Comment, Post
+
+_explicit_dates = contextvars.ContextVar('explicit_dates', default=False)
+
+
+def batch_size(model, wanted):
+    """batch_size для bulk_create не больше предела бэкенда: Django 2.2
+    сам явный размер не урезает, а у SQLite — 999 параметров на запрос.
+    """
+    limit = connection.ops.bulk_batch_size(model._meta.concrete_fields, ())
+    return max(min(wanted, limit), 1)
+
+
+def reset_sequences(*models):
+    """После вставки с явными ключами сдвигает последовательности
+    (PostgreSQL); SQLite обходится без этого."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def _keep_explicit_date(field):
+    """pre_save поля с auto_now_add оставляет переданную дату внутри
+    explicit_dates(); вне его и для пустой даты — обычное поведение."""
+    pre_save = field.pre_save
+
+    def wrapper(model_instance, add):
+        value = getattr(model_instance, field.attname)
+        if add and value is not None and _explicit_dates.get():
+            return value
+        return pre_save(model_instance, add)
+
+    field.pre_save = wrapper
+
+
+_keep_explicit_date(Post._meta.get_field('pub_date'))
+_keep_explicit_date(Comment._meta.get_field('created'))
+
+
+@contextmanager
+def explicit_dates():
+    """bulk_create внутри блока сохраняет переданные даты постов и
+    комментариев. Флаг в ContextVar, а не auto_now_add = False на общем
+    поле: другие потоки и посты без даты по-прежнему получают текущее
+    время."""
+    token = _explicit_dates.set(True)
+    try:
+        yield
+    finally:
+        _explicit_dates.reset(token)
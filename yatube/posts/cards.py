@@ -0,0 +1,135 @@
+"""Кеш отрендеренных карточек постов.
+
+Ключ карточки собирается из поколений поста, его автора и группы.
+Сигналы сохранения и удаления увеличивают поколение, и старая карточка
+просто перестаёт находиться, поэтому правки видны сразу, а перебирать
+посты группы или автора при инвалидации не нужно. Поколения видны
+всем процессам только в общем кеше; с locmem карточки живут
+POST_CARD_LOCAL_CACHE_TIMEOUT.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.template.loader import render_to_string
+
+from core import metrics
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+POST = 'post'
+GROUP = 'group'
+USER = 'user'
+# Подписки пользователя: в карточки не входят, только в метки
+# версий страниц профиля и ленты подписок.
+PROFILE = 'profile'
+# Поколение всех лент сразу: меняется при любой правке постов,
+# групп или пользователей и входит в ключ кеша целых страниц.
+FEED = 'feed'
+FEED_ALL = 'all'
+# Счётчики комментариев на карточках: комментарий меняет только их и
+# не сбрасывает ни метку, ни кеш страницы поста.
+COMMENTS = 'comments'
+# Рейтинг ленты популярного: меняется с каждым сдвигом Post.score
+# (posts.trending).
+TRENDING = 'trending'
+
+
+def _generation_key(kind, pk):
+    return f'card_gen:{kind}:{pk}'
+
+
+def _fresh_generation():
+    # Поколение после вытеснения из кеша не должно совпасть со
+    # старым, иначе снова найдётся устаревшая карточка.
+    return time.time_ns()
+
+
+def bump(kind, pk):
+    """Делает недействительными все карточки, зависящие от объекта."""
+    key = _generation_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), None)
+
+
+def generation(kind, pk):
+    """Текущее поколение объекта; годится в ETag и ключи кеша."""
+    key = _generation_key(kind, pk)
+    value = cache.get(key)
+    if value is None:
+        value = _fresh_generation()
+        cache.set(key, value, None)
+    return value
+
+
+def feed_generation(*args, **kwargs):
+    return generation(FEED, FEED_ALL)
+
+
+def list_generation(*args, **kwargs):
+    """Поколение страниц со списками карточек: лента плюс счётчики
+    комментариев на карточках."""
+    return f'{feed_generation()}:{generation(COMMENTS, FEED_ALL)}'
+
+
+def popular_generation(*args, **kwargs):
+    return f'{list_generation()}:{generation(TRENDING, FEED_ALL)}'
+
+
+def _generations(posts):
+    keys = set()
+    for post in posts:
+        keys.add(_generation_key(POST, post.pk))
+        keys.add(_generation_key(USER, post.author_id))
+        if post.group_id:
+            keys.add(_generation_key(GROUP, post.group_id))
+    generations = cache.get_many(keys)
+    missing = {key: _fresh_generation() for key in keys - generations.keys()}
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return generations
+
+
+def card_key(post, generations, flags):
+    parts = [
+        generations[_generation_key(POST, post.pk)],
+        generations[_generation_key(USER, post.author_id)],
+    ]
+    if post.group_id:
+        parts.append(generations[_generation_key(GROUP, post.group_id)])
+    flags = ','.join(sorted(name for name, value in flags.items() if value))
+    return 'post_card:{}:{}:{}'.format(
+        post.pk, ':'.join(str(part) for part in parts), flags
+    )
+
+
+def card_timeout():
+    """Срок жизни карточки. Сброс поколения в locmem не виден другим
+    процессам, поэтому там карточка живёт недолго."""
+    if isinstance(caches['default'], LocMemCache):
+        return settings.POST_CARD_LOCAL_CACHE_TIMEOUT
+    return settings.POST_CARD_CACHE_TIMEOUT
+
+
+def render_cards(posts, **flags):
+    """Возвращает HTML карточек в порядке posts, дорисовывая только
+    те, которых нет в кеше."""
+    posts = list(posts)
+    generations = _generations(posts)
+    keys = [card_key(post, generations, flags) for post in posts]
+    cached = cache.get_many(keys)
+    metrics.record_cache(hits=len(cached), misses=len(keys) - len(cached))
+    rendered = {}
+    for post, key in zip(posts, keys):
+        if key not in cached:
+            rendered[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, **flags}
+            )
+    if rendered:
+        cache.set_many(rendered, card_timeout())
+        cached.update(rendered)
+    return [cached[key] for key in keys]
@@ -0,0 +1,110 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Все изменения делаются F()-выражениями прямо в UPDATE, поэтому
+параллельные запросы не теряют друг друга. reconcile() пересчитывает
+счётчики по реальным данным.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Profile
+
+from .models import Comment, Follow, Post, User
+
+
+def _shift(queryset, **deltas):
+    updated = 0
+    for field, delta in deltas.items():
+        rows = queryset
+        if delta < 0:
+            # Не уходим ниже нуля, если счётчик уже разошёлся.
+            rows = rows.filter(**{f'{field}__gte': -delta})
+        updated += rows.update(**{field: F(field) + delta})
+    return updated
+
+
+def change_profile(user_id, **deltas):
+    updated = _shift(Profile.objects.filter(user_id=user_id), **deltas)
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        # Профиля нет (пользователь старше счётчиков): создаём
+        # сразу с правильными значениями.
+        Profile.objects.get_or_create(user_id=user_id)
+        reconcile_profiles(Profile.objects.filter(user_id=user_id))
+
+
+def change_many(queryset, field, deltas):
+    """Сдвигает счётчик у многих строк: {pk: сдвиг}. Одно UPDATE на
+    каждое различное значение сдвига, а не на строку."""
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        _shift(queryset.filter(pk__in=pks), **{field: delta})
+
+
+def change_comments(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def get_profile(user):
+    # Сначала обычное чтение: get_or_create идёт в базу для записи и
+    # на страницах лент увёл бы запрос с реплики.
+    try:
+        return Profile.objects.get(user=user)
+    except Profile.DoesNotExist:
+        pass
+    profile, created = Profile.objects.get_or_create(user=user)
+    if created:
+        reconcile_profiles(Profile.objects.filter(pk=profile.pk))
+        profile.refresh_from_db()
+    return profile
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def _reconcile(queryset, **actuals):
+    """Обновляет только разошедшиеся строки, возвращает их число."""
+    fixed = 0
+    for field, actual in actuals.items():
+        stale = queryset.annotate(actual=actual).exclude(
+            **{field: F('actual')}
+        )
+        fixed += queryset.filter(
+            pk__in=stale.values('pk')
+        ).update(**{field: actual})
+    return fixed
+
+
+def reconcile_posts(queryset=None):
+    if queryset is None:
+        queryset = Post.objects.all()
+    return _reconcile(
+        queryset.order_by(), comments_count=_count(Comment.objects, 'post')
+    )
+
+
+def reconcile_profiles(queryset=None):
+    if queryset is None:
+        missing = User.objects.filter(
+            profile__isnull=True
+        ).values_list('pk', flat=True)
+        Profile.objects.bulk_create(
+            [Profile(user_id=pk) for pk in missing], ignore_conflicts=True,
+        )
+        queryset = Profile.objects.all()
+    return _reconcile(
+        queryset.order_by(),
+        posts_count=_count(Post.objects, 'author'),
+        followers_count=_count(Follow.objects, 'author'),
+        following_count=_count(Follow.objects, 'user'),
+    )
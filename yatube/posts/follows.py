@@ -0,0 +1,69 @@
+"""Граф подписок с кешированными множествами.
+
+Для каждого пользователя в кеше лежат два frozenset: на кого он
+подписан и кто подписан на него. «Подписан ли A на B» — проверка
+членства, без запроса; множество читается из базы одним запросом по
+индексу при промахе. Обработчики Follow в posts.signals сбрасывают оба
+множества сразу и ещё раз после фиксации транзакции, чтобы параллельный
+запрос не успел закешировать состояние до неё. Кеш — только для
+чтения при показе страниц: решения о записи по нему не принимаются.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWEES = 'followees'
+FOLLOWERS = 'followers'
+
+
+def _key(kind, user_id):
+    return f'follows:{kind}:{user_id}'
+
+
+def _load(kind, user_id):
+    key = _key(kind, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        if kind == FOLLOWEES:
+            rows = Follow.objects.filter(user_id=user_id).values_list(
+                'author_id', flat=True
+            )
+        else:
+            rows = Follow.objects.filter(author_id=user_id).values_list(
+                'user_id', flat=True
+            )
+        ids = frozenset(rows)
+        cache.set(key, ids, settings.FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def followees(user_id):
+    """На кого подписан пользователь."""
+    if user_id is None:
+        return frozenset()
+    return _load(FOLLOWEES, user_id)
+
+
+def followers(user_id):
+    """Кто подписан на пользователя."""
+    if user_id is None:
+        return frozenset()
+    return _load(FOLLOWERS, user_id)
+
+
+def is_following(user_id, author_id):
+    return author_id in followees(user_id)
+
+
+def _invalidate(user_id, author_id):
+    cache.delete_many([
+        _key(FOLLOWEES, user_id), _key(FOLLOWERS, author_id),
+    ])
+
+
+def invalidate(user_id, author_id):
+    """Подписка user → author появилась или пропала."""
+    _invalidate(user_id, author_id)
+    transaction.on_commit(lambda: _invalidate(user_id, author_id))
@@ -1,5 +1,6 @@
 from django import forms
 
+from posts import export
 from posts.models import Post, Comment
 
 
@@ -16,3 +17,33 @@ class CommentForm(forms.ModelForm):
         model = Comment
         fields = ('text',)
         help_texts = {'text': 'Insert text'}
+
+
+class ExportForm(forms.Form):
+    """Параметры выгрузки; общие для представления и команды."""
+    kind = forms.ChoiceField(
+        choices=((export.POSTS, 'Посты'), (export.COMMENTS, 'Комментарии')),
+        initial=export.POSTS,
+    )
+    format = forms.ChoiceField(
+        choices=((export.CSV, 'CSV'), (export.JSONL, 'JSON Lines')),
+        initial=export.CSV,
+    )
+    group = forms.SlugField(required=False)
+    author = forms.CharField(required=False, max_length=150)
+    since = forms.DateField(required=False)
+    until = forms.DateField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since = cleaned_data.get('since')
+        until = cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError('Начало периода позже конца')
+        return cleaned_data
+
+    def filters(self):
+        return {
+            name: self.cleaned_data[name]
+            for name in ('group', 'author', 'since', 'until')
+        }
@@ -0,0 +1,77 @@
+"""Приём картинок постов: уменьшение, перекодирование и дедупликация.
+
+Оригиналы с телефонов весят мегабайты и потом многократно декодируются
+ради миниатюр. Перед сохранением картинка поворачивается по EXIF,
+ужимается до POST_IMAGE_MAX_SIZE и перекодируется в POST_IMAGE_FORMAT
+без метаданных. Одинаковые по содержимому загрузки находятся по хешу и
+ссылаются на один файл.
+"""
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'WEBP': 'webp',
+    'GIF': 'gif',
+}
+
+
+def _encode(image, image_format):
+    output = io.BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(
+            output, 'JPEG', quality=settings.POST_IMAGE_QUALITY,
+            optimize=True, progressive=True,
+        )
+    elif image_format == 'WEBP':
+        image.save(output, 'WEBP', quality=settings.POST_IMAGE_QUALITY)
+    else:
+        image.save(output, image_format, optimize=True)
+    return output.getvalue()
+
+
+def normalize(file):
+    """Возвращает (содержимое, расширение) для сохранения.
+
+    Форматы из POST_IMAGE_PASSTHROUGH_FORMATS (анимированные GIF)
+    сохраняются как есть.
+    """
+    file.seek(0)
+    original = file.read()
+    image = Image.open(io.BytesIO(original))
+    source_format = image.format
+    if source_format in settings.POST_IMAGE_PASSTHROUGH_FORMATS:
+        return original, EXTENSIONS.get(source_format)
+    image = ImageOps.exif_transpose(image)
+    if image.mode == 'P' and 'transparency' in image.info:
+        # Прозрачность палитры не переживает перекодирования.
+        image = image.convert('RGBA')
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    image_format = settings.POST_IMAGE_FORMAT
+    if image_format == 'JPEG' and 'A' in image.getbands():
+        # JPEG теряет прозрачность, такие картинки оставляем в PNG.
+        image_format = 'PNG'
+    return _encode(image, image_format), EXTENSIONS[image_format]
+
+
+def ingest(post):
+    """Подготавливает ещё не сохранённую картинку поста."""
+    content, extension = normalize(post.image.file)
+    digest = hashlib.sha256(content).hexdigest()
+    post.image_hash = digest
+    existing = type(post).objects.filter(image_hash=digest).exclude(
+        image=''
+    ).values_list('image', flat=True).first()
+    if existing and post.image.storage.exists(existing):
+        post.image = existing
+        return
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    if extension is None:
+        extension = os.path.splitext(post.image.name)[1].lstrip('.')
+    post.image = ContentFile(content, name=f'{stem}.{extension}')
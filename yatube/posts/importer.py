@@ -0,0 +1,375 @@
+"""Массовый импорт постов и комментариев из CSV и JSON Lines.
+
+Файл читается потоково и обрабатывается партиями. Текст каждой строки
+проверяется правилами PostForm или CommentForm, а ссылки на авторов,
+группы и посты разрешаются словарями: на партию — один запрос за
+ключами, которых ещё нет в словаре, а не запрос на строку. Годные
+строки пишутся bulk_create, партия — одна транзакция; в ней же
+F()-выражениями сдвигаются счётчики затронутых профилей и постов.
+
+После каждой партии в файл контрольной точки пишется число прочитанных
+строк, и прерванный импорт продолжается с места остановки. Если процесс
+упал между фиксацией партии и записью точки, партия прочитается
+повторно: посты с id отсеются как уже существующие, а посты без id и
+комментарии, у которых нет ключа для сверки, запишутся ещё раз.
+
+Формат строк совпадает с posts.export, так что выгрузку можно залить
+обратно; колонка id, если есть, сохраняется как первичный ключ, чтобы
+на посты могли сослаться комментарии.
+"""
+import csv
+import json
+import os
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from users.models import Profile
+
+from . import bulk, cards, counters, timeline
+from .export import CSV, JSONL, POSTS
+from .forms import CommentForm, PostForm
+from .models import Comment, Group, Post, User
+from .search import get_backend as search_backend
+
+# Поля форм, которые разрешаются словарями, а не валидацией формы:
+# ModelChoiceField делал бы запрос на каждую строку.
+RESOLVED_FIELDS = ('group', 'image')
+
+
+def read_rows(path, file_format):
+    """Строки файла словарями, по одной, без чтения файла целиком."""
+    with open(path, encoding='utf-8', newline='') as source:
+        if file_format == CSV:
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def guess_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return JSONL if extension in (JSONL, 'json', 'ndjson') else CSV
+
+
+class LookupMap:
+    """Словарь ключ → pk, который добирает недостающие ключи партии
+    одним запросом. Промахи тоже запоминаются."""
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.known = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.known}
+        if missing:
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for key in missing:
+                self.known[key] = found.get(key)
+        return [key for key in missing if self.known[key] is None]
+
+    def get(self, key):
+        return self.known.get(key)
+
+
+class RowValidator:
+    """Правила формы для строк импорта.
+
+    Форма на каждую строку стоила бы дороже самой вставки: она копирует
+    поля и создаёт экземпляр модели. Поля формы создаются один раз, а на
+    строку вызываются clean() поля и валидаторы поля модели. Своих
+    clean_*() у PostForm и CommentForm нет, так что правила те же.
+    """
+
+    def __init__(self, form_class):
+        form = form_class()
+        self.model = form._meta.model
+        self.fields = {
+            name: field for name, field in form.fields.items()
+            if name not in RESOLVED_FIELDS
+        }
+
+    def __call__(self, data):
+        cleaned = {}
+        errors = {}
+        for name, field in self.fields.items():
+            try:
+                value = field.clean(data.get(name))
+                self.model._meta.get_field(name).run_validators(value)
+            except ValidationError as error:
+                errors[name] = [
+                    {'message': message} for message in error.messages
+                ]
+            else:
+                cleaned[name] = value
+        return cleaned, errors
+
+
+class Checkpoint:
+    """Сколько строк файла уже обработано. Хранится рядом с файлом и
+    помнит его размер, чтобы не продолжить импорт другого файла."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.size = os.path.getsize(source)
+        self.rows = self.imported = self.skipped = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state['size'] != self.size:
+            raise ValueError(
+                'Контрольная точка записана для другого файла: '
+                f'{self.path}'
+            )
+        self.rows = state['rows']
+        self.imported = state['imported']
+        self.skipped = state['skipped']
+
+    def save(self):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump({
+                'size': self.size,
+                'rows': self.rows,
+                'imported': self.imported,
+                'skipped': self.skipped,
+            }, checkpoint_file)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Importer:
+    def __init__(
+        self, kind, batch_size=1000, create_missing=False, log=None,
+        errors=None,
+    ):
+        self.kind = kind
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.log = log or (lambda message: None)
+        self.errors = errors
+        self.validate = RowValidator(
+            PostForm if kind == POSTS else CommentForm
+        )
+        self.authors = LookupMap(User.objects, 'username')
+        self.groups = LookupMap(Group.objects, 'slug')
+        self.created_users = 0
+        self.created_groups = 0
+
+    def run(self, path, file_format=None, checkpoint_path=None,
+            resume=False):
+        checkpoint = Checkpoint(
+            checkpoint_path or f'{path}.checkpoint', path
+        )
+        if resume:
+            checkpoint.load()
+        rows = read_rows(path, file_format or guess_format(path))
+        rows = enumerate(islice(rows, checkpoint.rows, None), checkpoint.rows)
+        started = time.perf_counter()
+        done = 0
+        with bulk.explicit_dates():
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                imported = self.import_batch(batch)
+                checkpoint.rows += len(batch)
+                checkpoint.imported += imported
+                checkpoint.skipped += len(batch) - imported
+                checkpoint.save()
+                done += len(batch)
+                elapsed = time.perf_counter() - started
+                self.log(
+                    f'Строк: {checkpoint.rows}, импортировано '
+                    f'{checkpoint.imported}, пропущено {checkpoint.skipped}; '
+                    f'{done / elapsed:.0f} строк/с'
+                )
+        bulk.reset_sequences(Post)
+        checkpoint.clear()
+        return {
+            'rows': checkpoint.rows,
+            'imported': checkpoint.imported,
+            'skipped': checkpoint.skipped,
+            'users': self.created_users,
+            'groups': self.created_groups,
+            'seconds': time.perf_counter() - started,
+        }
+
+    def reject(self, number, errors):
+        if self.errors is not None:
+            self.errors.write(json.dumps(
+                {'row': number + 1, 'errors': errors}, ensure_ascii=False
+            ) + '\n')
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return timezone.now()
+        date = parse_datetime(value)
+        if date is None:
+            raise ValueError(value)
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        return date
+
+    def resolve_authors(self, batch):
+        missing = self.authors.resolve(
+            row.get('author') for _, row in batch
+        )
+        if not (missing and self.create_missing):
+            return
+        username = User._meta.get_field('username')
+        users = []
+        for name in missing:
+            try:
+                username.clean(name, None)
+            except ValidationError:
+                continue
+            users.append(User(username=name, password=make_password(None)))
+        User.objects.bulk_create(
+            users, batch_size=bulk.batch_size(User, self.batch_size)
+        )
+        self.created_users += len(users)
+        self.authors.known.update(dict(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('username', 'pk')))
+        Profile.objects.bulk_create([
+            Profile(user_id=self.authors.get(user.username))
+            for user in users
+        ], ignore_conflicts=True)
+
+    def resolve_groups(self, batch):
+        missing = self.groups.resolve(row.get('group') for _, row in batch)
+        if not (missing and self.create_missing):
+            return
+        groups = [
+            Group(title=slug[:200], slug=slug, description='')
+            for slug in missing
+        ]
+        Group.objects.bulk_create(groups)
+        self.created_groups += len(groups)
+        self.groups.known.update(dict(Group.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'pk')))
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        """Пишет годные строки партии, возвращает их число."""
+        self.resolve_authors(batch)
+        if self.kind == POSTS:
+            self.resolve_groups(batch)
+            objects = self.build_posts(batch)
+        else:
+            objects = self.build_comments(batch)
+        model = Post if self.kind == POSTS else Comment
+        model.objects.bulk_create(
+            objects, batch_size=bulk.batch_size(model, self.batch_size)
+        )
+        if self.kind == POSTS:
+            counters.change_many(
+                Profile.objects, 'posts_count',
+                Counter(post.author_id for post in objects),
+            )
+        else:
+            post_ids = Counter(comment.post_id for comment in objects)
+            counters.change_many(Post.objects, 'comments_count', post_ids)
+            transaction.on_commit(lambda: [
+                cards.bump(cards.POST, post_id) for post_id in post_ids
+            ])
+        return len(objects)
+
+    def build_common(self, row):
+        """Общая часть: поля по правилам формы, автор и дата."""
+        data, errors = self.validate(row)
+        author_id = self.authors.get(row.get('author'))
+        if author_id is None:
+            errors['author'] = [{'message': 'Нет такого пользователя'}]
+        date_field = 'pub_date' if self.kind == POSTS else 'created'
+        try:
+            date = self.parse_date(row.get(date_field))
+        except ValueError:
+            errors[date_field] = [{'message': 'Неверная дата'}]
+            date = None
+        return data, errors, author_id, date
+
+    def build_posts(self, batch):
+        ids = {
+            int(row['id']) for _, row in batch
+            if str(row.get('id') or '').isdigit()
+        }
+        taken = set(
+            Post.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        posts = []
+        for number, row in batch:
+            data, errors, author_id, date = self.build_common(row)
+            pk = row.get('id') or None
+            if pk is not None:
+                if not str(pk).isdigit():
+                    errors['id'] = [{'message': 'Неверный id'}]
+                elif int(pk) in taken:
+                    errors['id'] = [{'message': 'Пост с таким id уже есть'}]
+                else:
+                    pk = int(pk)
+                    taken.add(pk)
+            group_id = None
+            if row.get('group'):
+                group_id = self.groups.get(row['group'])
+                if group_id is None:
+                    errors['group'] = [{'message': 'Нет такой группы'}]
+            if errors:
+                self.reject(number, errors)
+                continue
+            posts.append(Post(
+                pk=pk, text=data['text'], author_id=author_id,
+                group_id=group_id, pub_date=date,
+                image=row.get('image') or '',
+            ))
+        return posts
+
+    def build_comments(self, batch):
+        ids = {
+            int(row['post']) for _, row in batch
+            if str(row.get('post') or '').isdigit()
+        }
+        existing = set(
+            Post.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        comments = []
+        for number, row in batch:
+            data, errors, author_id, date = self.build_common(row)
+            post_id = str(row.get('post') or '')
+            if not post_id.isdigit() or int(post_id) not in existing:
+                errors['post'] = [{'message': 'Нет такого поста'}]
+            if errors:
+                self.reject(number, errors)
+                continue
+            comments.append(Comment(
+                post_id=int(post_id), author_id=author_id,
+                text=data['text'], created=date,
+            ))
+        return comments
+
+    def finish(self, index_search=False, timelines=True):
+        """Производные данные, которые дешевле пересобрать разом."""
+        if self.kind == POSTS and timelines:
+            timeline.rebuild_all()
+        if index_search:
+            search_backend().rebuild()
+        cards.bump(cards.FEED, cards.FEED_ALL)
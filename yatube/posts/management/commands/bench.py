@@ -0,0 +1,155 @@
+import json
+import os
+import resource
+import tempfile
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases,
+)
+
+from posts import bench, seeding
+from posts.models import Post
+
+MODES = ('client', 'load')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет ленты, страницу поста и создание поста: p50/p95/p99, '
+        'SQL на запрос и память. По умолчанию работает на отдельной '
+        'тестовой базе, которую наполняет сам. С --save результаты '
+        'сохраняются, с --compare сравниваются с сохранёнными, и рост '
+        'p95 больше --tolerance или числа SQL считается регрессией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--follows', type=int, default=300)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов на сценарий в каждом режиме.',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--mode', choices=MODES, action='append',
+            help='client — тестовый клиент, load — нагрузка по HTTP. '
+                 'По умолчанию оба.',
+        )
+        parser.add_argument(
+            '--scenario', action='append',
+            help='Замерить только эти сценарии.',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом тестового клиента.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу и не наполнять её повторно.',
+        )
+        parser.add_argument(
+            '--db-file',
+            default=os.path.join(
+                tempfile.gettempdir(), 'yatube_bench.sqlite3'
+            ),
+            help='Файл тестовой базы SQLite; по умолчанию во временном '
+                 'каталоге, вне дерева исходников.',
+        )
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help='Мерить на текущей базе, не создавая тестовую.',
+        )
+        parser.add_argument('--save', metavar='FILE')
+        parser.add_argument('--compare', metavar='FILE')
+        parser.add_argument('--tolerance', type=float, default=0.25)
+
+    def handle(self, *args, **options):
+        if options['current_db']:
+            results = self.run(options)
+        else:
+            results = self.run_on_test_db(options)
+        self.report(results)
+        if options['save']:
+            with open(options['save'], 'w') as baseline_file:
+                json.dump(results, baseline_file, indent=2)
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            found = bench.regressions(
+                results, baseline, options['tolerance']
+            )
+            if found:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(found)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_on_test_db(self, options):
+        # Файловая база, а не :memory:, чтобы её видели потоки сервера.
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = options['db_file']
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options['keepdb']
+        )
+        try:
+            return self.run(options)
+        finally:
+            teardown_databases(
+                old_config, verbosity=0, keepdb=options['keepdb']
+            )
+
+    def run(self, options):
+        if not Post.objects.exists():
+            self.stdout.write('Наполнение базы...')
+            seeding.seed(
+                options['users'], options['groups'], options['posts'],
+                options['comments'], options['follows'],
+                seed=options['seed'], prefix='bench',
+            )
+        scenarios = bench.scenarios()
+        if options['scenario']:
+            scenarios = [
+                scenario for scenario in scenarios
+                if scenario.name in options['scenario']
+            ]
+        modes = options['mode'] or MODES
+        cold = cache.clear if options['cold'] else None
+        results = {scenario.name: {} for scenario in scenarios}
+        with override_settings(PERFORMANCE_SERVER_TIMING=True):
+            if 'client' in modes:
+                for scenario in scenarios:
+                    results[scenario.name]['client'] = bench.run_client(
+                        scenario, options['requests'], cold=cold
+                    )
+            if 'load' in modes:
+                with bench.LoadServer() as server:
+                    for scenario in scenarios:
+                        results[scenario.name]['load'] = bench.run_load(
+                            server, scenario, options['requests'],
+                            options['concurrency'],
+                        )
+        return results
+
+    def report(self, results):
+        columns = (
+            'requests', 'p50_ms', 'p95_ms', 'p99_ms', 'queries',
+            'peak_kb', 'rps', 'errors',
+        )
+        self.stdout.write(
+            f'{"":<22}' + ''.join(f'{column:>10}' for column in columns)
+        )
+        for name, modes in results.items():
+            for mode, summary in modes.items():
+                cells = ''.join(
+                    f'{summary.get(column, "-"):>10}' for column in columns
+                )
+                self.stdout.write(f'{name + " [" + mode + "]":<22}{cells}')
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.stdout.write(f'Пиковая память процесса: {max_rss // 1024} МБ')
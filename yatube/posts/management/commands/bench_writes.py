@@ -0,0 +1,97 @@
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+
+from posts import bench, seeding
+
+BACKENDS = {
+    'stock': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'OPTIONS': {},
+        'CONN_MAX_AGE': 0,
+    },
+    'tuned': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'OPTIONS': {},
+        'CONN_MAX_AGE': 600,
+    },
+}
+WRITE_SCENARIOS = ('post_create', 'add_comment')
+
+
+def use_database(settings_dict):
+    """Подменяет default: потоки сервера создадут соединения заново."""
+    connections['default'].close()
+    del connections['default']
+    connections.databases['default'] = settings_dict
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентную запись (создание постов и комментариев '
+        'по HTTP в несколько потоков) на обычном бэкенде SQLite и на '
+        'core.db.backends.sqlite3. Каждый бэкенд меряется на своей '
+        'файловой тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--backend', choices=BACKENDS, action='append',
+            help='По умолчанию оба.',
+        )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Сравнение имеет смысл только для SQLite')
+        original = connections.databases['default']
+        results = {}
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for name in options['backend'] or BACKENDS:
+                    settings_dict = dict(original, **BACKENDS[name])
+                    settings_dict['TEST'] = dict(
+                        original.get('TEST', {}),
+                        NAME=os.path.join(directory, f'{name}.sqlite3'),
+                    )
+                    use_database(settings_dict)
+                    results[name] = self.run(options)
+        finally:
+            use_database(original)
+        self.report(results)
+
+    def run(self, options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seeding.seed(20, 2, 100, 100, 50, prefix='bench')
+            scenarios = [
+                scenario for scenario in bench.scenarios()
+                if scenario.name in WRITE_SCENARIOS
+            ]
+            with bench.LoadServer() as server:
+                return {
+                    scenario.name: bench.run_load(
+                        server, scenario, options['requests'],
+                        options['concurrency'],
+                    )
+                    for scenario in scenarios
+                }
+        finally:
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+
+    def report(self, results):
+        columns = ('requests', 'p50_ms', 'p95_ms', 'p99_ms', 'rps', 'errors')
+        self.stdout.write(
+            f'{"":<22}' + ''.join(f'{column:>10}' for column in columns)
+        )
+        for backend, scenarios in results.items():
+            for name, summary in scenarios.items():
+                cells = ''.join(
+                    f'{summary[column]:>10}' for column in columns
+                )
+                self.stdout.write(f'{name + " [" + backend + "]":<22}{cells}')
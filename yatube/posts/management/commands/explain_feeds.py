@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Comment, Follow, Post
+from posts.timeline import timeline_posts
+
+REPEATS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает план выполнения и время запросов каждой ленты. '
+        'С --save план сохраняется, с --compare сравнивается с сохранённым '
+        '(например, до и после migrate posts 0013).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--save', metavar='FILE')
+        parser.add_argument('--compare', metavar='FILE')
+
+    def feed_queries(self):
+        post = Post.objects.exclude(group=None).first()
+        follow = Follow.objects.first()
+        if post is None or follow is None:
+            raise CommandError(
+                'Нужны хотя бы один пост с группой и одна подписка.'
+            )
+        limit = settings.POSTS_AMOUNT + 1
+        feed = Post.objects.select_related('author', 'group').order_by(
+            '-pub_date', '-id'
+        )
+        return {
+            'index': feed[:limit],
+            'group_posts': feed.filter(group=post.group_id)[:limit],
+            'popular': Post.objects.trending().order_by(
+                '-score', '-id'
+            )[:limit],
+            'profile': feed.filter(author=post.author_id)[:limit],
+            'follow_index': timeline_posts(follow.user).order_by(
+                '-pub_date', '-id'
+            )[:limit],
+            'post_detail comments': Comment.objects.filter(
+                post=post
+            ).order_by('-created', '-id')[:limit],
+            'profile following': Follow.objects.filter(
+                user=follow.user_id
+            ).values_list('author_id', flat=True),
+        }
+
+    def handle(self, *args, **options):
+        plans = {}
+        for name, queryset in self.feed_queries().items():
+            plan = queryset.explain()
+            started = time.perf_counter()
+            for _ in range(REPEATS):
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) / REPEATS * 1000
+            plans[name] = plan
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {elapsed:.2f} ms'
+            ))
+            self.stdout.write(plan)
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            for name, plan in plans.items():
+                if baseline.get(name) != plan:
+                    self.stdout.write(self.style.WARNING(
+                        f'\n{name}: план изменился, было:'
+                    ))
+                    self.stdout.write(baseline.get(name, '-'))
+        if options['save']:
+            with open(options['save'], 'w') as baseline_file:
+                json.dump(plans, baseline_file, ensure_ascii=False, indent=2)
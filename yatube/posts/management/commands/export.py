@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.forms import ExportForm
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты или комментарии в CSV или JSON Lines '
+        'с фильтрами по группе, автору и датам. Память не растёт с '
+        'размером таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind', nargs='?', default=export.POSTS,
+            choices=(export.POSTS, export.COMMENTS),
+        )
+        parser.add_argument(
+            '--format', default=export.CSV, choices=(export.CSV, export.JSONL),
+        )
+        parser.add_argument('--group', help='Слаг группы.')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--since', help='С даты, ГГГГ-ММ-ДД.')
+        parser.add_argument('--until', help='По дату включительно.')
+        parser.add_argument(
+            '--output', '-o', help='Файл; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        form = ExportForm({
+            name: options[name] or ''
+            for name in ('kind', 'format', 'group', 'author', 'since',
+                         'until')
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        chunks = export.stream(
+            form.cleaned_data['kind'], form.cleaned_data['format'],
+            **form.filters(),
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(chunks)
+            return
+        for chunk in chunks:
+            self.stdout.write(chunk, ending='')
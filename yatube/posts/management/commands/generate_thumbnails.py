@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Досчитывает миниатюры для уже загруженных картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Сколько картинок обрабатывать параллельно.',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = Post.objects.exclude(image='').values_list(
+            'id', flat=True
+        ).iterator()
+        done = 0
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                for _ in executor.map(thumbnails.generate_in_worker, post_ids):
+                    done += 1
+        else:
+            for post_id in post_ids:
+                thumbnails.generate(post_id)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов с картинками: {done}'
+        ))
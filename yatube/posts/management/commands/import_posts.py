@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+from posts.export import COMMENTS, CSV, JSONL, POSTS
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты или комментарии из CSV или JSON Lines '
+        '(формат manage.py export): потоковое чтение, проверка правилами '
+        'форм, запись партиями с контрольными точками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--kind', default=POSTS, choices=(POSTS, COMMENTS),
+        )
+        parser.add_argument(
+            '--format', choices=(CSV, JSONL),
+            help='По умолчанию — по расширению файла.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки; по умолчанию ПУТЬ.checkpoint.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с контрольной точки.',
+        )
+        parser.add_argument(
+            '--errors', help='Куда писать отклонённые строки (JSONL).',
+        )
+        parser.add_argument('--index-search', action='store_true')
+        parser.add_argument('--skip-timelines', action='store_true')
+
+    def handle(self, *args, **options):
+        errors = None
+        if options['errors']:
+            errors = open(options['errors'], 'a', encoding='utf-8')
+        log = self.stdout.write if options['verbosity'] else None
+        loader = importer.Importer(
+            options['kind'], batch_size=options['batch_size'],
+            create_missing=options['create_missing'], log=log,
+            errors=errors,
+        )
+        try:
+            report = loader.run(
+                options['path'], options['format'],
+                checkpoint_path=options['checkpoint'],
+                resume=options['resume'],
+            )
+            loader.finish(
+                index_search=options['index_search'],
+                timelines=not options['skip_timelines'],
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        finally:
+            if errors is not None:
+                errors.close()
+        rate = report['rows'] / report['seconds'] if report['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {report["imported"]} из {report["rows"]}, '
+            f'пропущено {report["skipped"]}; новых пользователей '
+            f'{report["users"]}, групп {report["groups"]}; '
+            f'{report["seconds"]:.1f} с, {rate:.0f} строк/с'
+        ))
+        if report['skipped'] and not errors:
+            self.stderr.write(
+                'Причины отказов можно сохранить ключом --errors'
+            )
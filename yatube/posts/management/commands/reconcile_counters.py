@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с реальными данными.'
+
+    def handle(self, *args, **options):
+        posts = counters.reconcile_posts()
+        profiles = counters.reconcile_profiles()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: постов {posts}, профилей {profiles}'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Сдвигает эпоху рейтинга популярного (posts.trending) на текущий '
+        'момент. Обычно это делает фоновая задача сама; с --rebuild '
+        'рейтинги пересчитываются с нуля, например после импорта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать рейтинги по постам и комментариям окна '
+                 'TRENDING_WINDOW.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            scored = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Рейтинги пересчитаны, постов: {scored}'
+            ))
+            return
+        trending.renormalize()
+        self.stdout.write(self.style.SUCCESS('Эпоха рейтинга сдвинута'))
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу правдоподобными данными большого объёма: '
+        'пользователи, группы, посты, комментарии и подписки с '
+        'распределением по Ципфу. Повтор с тем же --seed даёт те же '
+        'данные. Счётчики считаются при загрузке, ленты подписок '
+        'пересобираются в конце, поисковый индекс — с --index-search.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа: чем больше, тем сильнее '
+                 'посты и подписчики сосредоточены у немногих авторов.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней разложены даты постов.',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с синтетической картинкой.',
+        )
+        parser.add_argument(
+            '--image-pool', type=int, default=20,
+            help='Сколько разных картинок сгенерировать.',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и слагов групп.',
+        )
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Строк на одну транзакцию.',
+        )
+        parser.add_argument(
+            '--index-search', action='store_true',
+            help='Перестроить поисковый индекс (долго на миллионах '
+                 'постов; можно позже через rebuild_search_index).',
+        )
+        parser.add_argument(
+            '--skip-timelines', action='store_true',
+            help='Не пересобирать ленты подписок.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        seeder = seeding.Seeder(
+            options['users'], options['groups'], options['posts'],
+            options['comments'], options['follows'], seed=options['seed'],
+            skew=options['skew'], days=options['days'],
+            images=options['images'], image_pool=options['image_pool'],
+            prefix=options['prefix'], password=options['password'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'], log=self.stdout.write,
+        )
+        try:
+            seeder.run(
+                index_search=options['index_search'],
+                timelines=not options['skip_timelines'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'База наполнена за {time.perf_counter() - started:.1f} с'
+        ))
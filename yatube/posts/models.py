@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from . import images
+
 User = get_user_model()
 
 TEXT_LIMIT = 15
@@ -15,6 +17,29 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    # Поля, которые читает карточка поста в лентах.
+    FEED_FIELDS = (
+        'text', 'pub_date', 'image', 'comments_count',
+        'author', 'author__username',
+        'author__first_name', 'author__last_name',
+        'group', 'group__slug', 'group__title',
+    )
+
+    def for_feed(self):
+        return self.select_related('author', 'group').only(*self.FEED_FIELDS)
+
+    def for_detail(self):
+        return self.select_related('author', 'group')
+
+    def trending(self):
+        # score читает курсор страницы, поэтому грузится вместе с полями
+        # карточки; условие совпадает с частичным индексом.
+        return self.filter(score__gt=0).select_related(
+            'author', 'group'
+        ).only(*self.FEED_FIELDS, 'score')
+
+
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Введите текст поста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
@@ -37,15 +62,76 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_hash = models.CharField(
+        'Хеш картинки', max_length=64, blank=True, editable=False,
+        db_index=True,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False
+    )
+    score = models.FloatField(
+        'Популярность', default=0, editable=False,
+        help_text='Затухающий рейтинг в единицах эпохи (posts.trending)',
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    DERIVED_FIELDS = ('comments_count', 'score')
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_date_idx'
+            ),
+            models.Index(
+                fields=['-score', '-id'], name='post_trending_idx',
+                condition=models.Q(score__gt=0),
+            ),
+        ]
 
     def __str__(self):
         return self.text[:TEXT_LIMIT]
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        deferred = self.get_deferred_fields()
+        if 'image' not in deferred and self.image and (
+            not self.image._committed
+        ):
+            images.ingest(self)
+        # Счётчик и рейтинг меняют только F()-выражения в posts.counters
+        # и posts.trending: при сохранении загруженного поста их значения
+        # устарели бы. Отложенные поля (.only(), .defer()) не пишутся,
+        # как и в Model.save, чтобы не догружать их по запросу на поле.
+        if update_fields is None and not force_insert and (
+            not self._state.adding
+            and using in (None, self._state.db)
+        ):
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DERIVED_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(
+            force_insert=force_insert, force_update=force_update,
+            using=using, update_fields=update_fields,
+        )
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_post(self, post):
+        return self.filter(post=post).select_related('author').only(
+            'post', 'text', 'created', 'author', 'author__username'
+        )
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -68,10 +154,17 @@ class Comment(models.Model):
     )
     created = models.DateTimeField('Дата комментария', auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -87,3 +180,45 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Тот, на кого подписываются',
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
+
+class TrendingEpoch(models.Model):
+    """Начало текущей эпохи рейтинга: относительно него посчитаны все
+    Post.score. Единственная строка, её сдвигает posts.trending."""
+    started = models.FloatField('Начало эпохи, Unix-время')
+
+    class Meta:
+        verbose_name = 'Эпоха рейтинга'
+        verbose_name_plural = 'Эпохи рейтинга'
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: запись поста у подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Владелец ленты',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
@@ -0,0 +1,183 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'posts.paginator.cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _dump_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        return parse_datetime(value['dt'])
+    return value
+
+
+class CursorPaginator(Paginator):
+    """Постраничная навигация по ключу (keyset) вместо OFFSET.
+
+    Страница строится условием «строго после/до последней показанной
+    записи» по полям ordering, поэтому глубокие страницы стоят столько же,
+    сколько первая, а COUNT(*) не выполняется вовсе. Курсор подписан и
+    непрозрачен для клиента.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id'), approximate_total=False):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.approximate_total = approximate_total
+
+    @staticmethod
+    def _field(item):
+        return item.lstrip('-')
+
+    def _ordered(self, reverse=False):
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                self._field(item) if item.startswith('-') else f'-{item}'
+                for item in ordering
+            )
+        return self.object_list.order_by(*ordering)
+
+    def _position_filter(self, values, direction):
+        """Условие (a, b) < (x, y), развёрнутое в OR для любого числа
+        полей с учётом направления сортировки каждого."""
+        condition = Q()
+        for index, item in enumerate(self.ordering):
+            descending = item.startswith('-')
+            if direction == PREVIOUS:
+                descending = not descending
+            lookup = 'lt' if descending else 'gt'
+            field = self._field(item)
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for prev_item, prev_value in zip(self.ordering[:index], values):
+                step &= Q(**{self._field(prev_item): prev_value})
+            condition |= step
+        return condition
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            _dump_value(getattr(obj, self._field(item)))
+            for item in self.ordering
+        ]
+        return signing.dumps(
+            {'v': values, 'd': direction}, salt=CURSOR_SALT, compress=True
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            values = [_load_value(value) for value in data['v']]
+            direction = data['d']
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS) or (
+            len(values) != len(self.ordering)
+        ):
+            raise InvalidCursor(cursor)
+        return values, direction
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._page(None, NEXT)
+        values, direction = self.decode_cursor(cursor)
+        return self._page(values, direction)
+
+    def get_page(self, cursor=None):
+        """Как Paginator.get_page: битый курсор даёт первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def _page(self, values, direction):
+        queryset = self._ordered(reverse=direction == PREVIOUS)
+        if values is not None:
+            queryset = queryset.filter(
+                self._position_filter(values, direction)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return CursorPage(rows, self, has_next, has_previous)
+
+    @cached_property
+    def count(self):
+        """Приблизительное число записей, кешируемое на
+        POSTS_COUNT_CACHE_TIMEOUT секунд; без approximate_total
+        считать нечего и возвращается None."""
+        if not self.approximate_total:
+            return None
+        query = str(self.object_list.order_by().query)
+        key = 'posts_count:' + hashlib.md5(query.encode()).hexdigest()
+        total = cache.get(key)
+        if total is None:
+            total = self.object_list.count()
+            cache.set(key, total, settings.POSTS_COUNT_CACHE_TIMEOUT)
+        return total
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} items>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+
+    # Номеров у страниц курсора нет: методы Page, которые их считают,
+    # возвращают None, и шаблон, написанный под Paginator, не падает.
+    def next_page_number(self):
+        return None
+
+    def previous_page_number(self):
+        return None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
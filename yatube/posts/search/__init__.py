@@ -0,0 +1,114 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Бэкенд задаётся настройкой POSTS_SEARCH_BACKEND, индекс обновляется
+сигналами постов и комментариев: удаление сразу, индексация — фоновыми
+задачами index_post и index_comment.
+"""
+import datetime
+import functools
+
+from django.conf import settings
+from django.core import signing
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.tasks import task
+
+from ..models import Comment, Post
+from ..paginator import (
+    NEXT, PREVIOUS, CursorPage, CursorPaginator, InvalidCursor,
+)
+
+SEARCH_CURSOR_SALT = 'posts.search.cursor'
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.POSTS_SEARCH_BACKEND)()
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    if setting == 'POSTS_SEARCH_BACKEND':
+        get_backend.cache_clear()
+
+
+@task()
+def index_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        get_backend().index_post(post)
+
+
+@task()
+def index_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is not None:
+        get_backend().index_comment(comment)
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная навигация по выдаче поиска.
+
+    Позиция — пара (score, id) из бэкенда; в курсор вместе с ней
+    кладётся момент первого запроса, чтобы свежесть считалась от
+    одного и того же времени на всех страницах.
+    """
+
+    def __init__(self, query, per_page, backend=None):
+        super().__init__(
+            Post.objects.none(), per_page, ordering=('search_score', 'id')
+        )
+        self.query = query
+        self.backend = backend or get_backend()
+        self.now = timezone.now()
+
+    def encode_cursor(self, obj, direction):
+        return signing.dumps(
+            {
+                'v': [obj.search_score, obj.pk],
+                'd': direction,
+                't': self.now.timestamp(),
+            },
+            salt=SEARCH_CURSOR_SALT, compress=True,
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=SEARCH_CURSOR_SALT)
+            score, pk = data['v']
+            direction = data['d']
+            now = datetime.datetime.fromtimestamp(
+                data['t'], datetime.timezone.utc
+            )
+        except (signing.BadSignature, KeyError, TypeError, ValueError,
+                OverflowError):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS):
+            raise InvalidCursor(cursor)
+        self.now = now
+        return (score, pk), direction
+
+    def _page(self, values, direction):
+        hits = self.backend.search(
+            self.query, self.per_page + 1, after=values,
+            reverse=direction == PREVIOUS, now=self.now,
+        )
+        has_more = len(hits) > self.per_page
+        hits = hits[:self.per_page]
+        if direction == PREVIOUS:
+            hits.reverse()
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in hits])
+        rows = []
+        for pk, score in hits:
+            post = posts.get(pk)
+            if post is not None:
+                post.search_score = score
+                rows.append(post)
+        if direction == PREVIOUS:
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return CursorPage(rows, self, has_next, has_previous)
@@ -0,0 +1,206 @@
+"""Бэкенды поиска по постам и комментариям.
+
+Бэкенд хранит индекс и отдаёт найденные посты парами (post_id, score),
+отсортированными по возрастанию score, затем по id: чем меньше score,
+тем выше пост в выдаче. Позиция (score, id) служит ключом курсора.
+"""
+import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Comment, Post
+from .stemmer import stems
+
+TABLE = 'posts_search'
+
+
+class BaseSearchBackend:
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def index_comment(self, comment):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def remove_comment(self, comment_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Переиндексирует всё с нуля."""
+        raise NotImplementedError
+
+    def search(self, query, limit, after=None, reverse=False, now=None):
+        """Пары (post_id, score) строго после позиции after.
+
+        С reverse=True — строго до неё и в обратном порядке, для
+        страницы назад. now фиксирует момент, от которого считается
+        свежесть, чтобы score не плыл между страницами.
+        """
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Инвертированный индекс в виртуальной таблице FTS5.
+
+    В индекс пишутся основы слов, а не сами слова, поэтому «котики»
+    находятся по запросу «котик». Пост и его комментарии — отдельные
+    документы с общим post_id; rowid чётный у постов и нечётный у
+    комментариев, так что обновление и удаление идут по первичному
+    ключу, без скана. Релевантность — скрытый столбец rank, то есть
+    bm25 (отрицательная, лучше — меньше); она делится
+    на 1 + возраст в днях / SEARCH_RECENCY_DAYS.
+    """
+
+    @staticmethod
+    def _document(text):
+        return ' '.join(stems(text))
+
+    def _replace(self, rowid, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, body, post_id) '
+                f'VALUES (%s, %s, %s)',
+                [rowid, self._document(text), post_id],
+            )
+
+    def _delete(self, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+
+    def index_post(self, post):
+        self._replace(post.pk * 2, post.pk, post.text)
+
+    def index_comment(self, comment):
+        self._replace(comment.pk * 2 + 1, comment.post_id, comment.text)
+
+    def remove_post(self, post_id):
+        self._delete(post_id * 2)
+
+    def remove_comment(self, comment_id):
+        self._delete(comment_id * 2 + 1)
+
+    def rebuild(self):
+        batch_size = settings.SEARCH_BATCH_SIZE
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            sources = (
+                (Post.objects.values_list('pk', 'pk', 'text'), 0),
+                (Comment.objects.values_list('pk', 'post_id', 'text'), 1),
+            )
+            for queryset, parity in sources:
+                rows = queryset.iterator(batch_size)
+                while True:
+                    batch = [
+                        (pk * 2 + parity, self._document(text), post_id)
+                        for pk, post_id, text in islice(rows, batch_size)
+                    ]
+                    if not batch:
+                        break
+                    cursor.executemany(
+                        f'INSERT INTO {TABLE} (rowid, body, post_id) '
+                        f'VALUES (%s, %s, %s)',
+                        batch,
+                    )
+            cursor.execute(
+                f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')"
+            )
+
+    @staticmethod
+    def match_expression(query):
+        """Все основы запроса как префиксы: «кот» найдёт и «котик»."""
+        return ' '.join(f'"{term}"*' for term in stems(query))
+
+    def search(self, query, limit, after=None, reverse=False, now=None):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        now = now or timezone.now()
+        position = ''
+        params = [match, now.timestamp(), settings.SEARCH_RECENCY_DAYS]
+        if after is not None:
+            position = 'WHERE (score, id) {} (%s, %s)'.format(
+                '<' if reverse else '>'
+            )
+            params.extend(after)
+        order = 'DESC' if reverse else 'ASC'
+        params.append(limit)
+        sql = f'''
+            WITH hits AS (
+                SELECT post_id, MIN(rank) AS relevance
+                FROM {TABLE} WHERE {TABLE} MATCH %s
+                GROUP BY post_id
+            ), scored AS (
+                SELECT post.id AS id, hits.relevance / (1 + MAX(
+                    julianday(%s, 'unixepoch') - julianday(post.pub_date), 0
+                ) / %s) AS score
+                FROM hits JOIN {Post._meta.db_table} AS post
+                ON post.id = hits.post_id
+            )
+            SELECT id, score FROM scored {position}
+            ORDER BY score {order}, id {order}
+            LIMIT %s
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Запасной бэкенд без индекса для баз без FTS5.
+
+    Ищет все слова запроса подстрокой в тексте поста или его
+    комментариев и сортирует только по свежести: score — это
+    pub_date со знаком минус.
+    """
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit, after=None, reverse=False, now=None):
+        words = query.split()
+        if not words:
+            return []
+        queryset = Post.objects.all()
+        for word in words:
+            queryset = queryset.filter(
+                Q(text__icontains=word) | Q(comments__text__icontains=word)
+            )
+        if after is not None:
+            score, post_id = after
+            pub_date = datetime.datetime.fromtimestamp(
+                -score, datetime.timezone.utc
+            )
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date)
+                    | Q(pub_date=pub_date, id__lt=post_id)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, id__gt=post_id)
+                )
+        ordering = ('pub_date', '-id') if reverse else ('-pub_date', 'id')
+        rows = queryset.distinct().order_by(*ordering).values_list(
+            'id', 'pub_date'
+        )[:limit]
+        return [(pk, -pub_date.timestamp()) for pk, pub_date in rows]
@@ -0,0 +1,81 @@
+"""Стеммер для русского языка по алгоритму Snowball (Портер).
+
+Окончания ищутся только в области RV — после первой гласной слова.
+Слова не на кириллице просто приводятся к нижнему регистру.
+"""
+import re
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'^[а-я]+$')
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому'
+    r'|их|ых|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло'
+    r'|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)'
+    r'|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием'
+    r'|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+I_ENDING = re.compile(r'и$')
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+SOFT_SIGN = re.compile(r'ь$')
+DOUBLE_N = re.compile(r'нн$')
+
+
+def _strip(pattern, text):
+    return pattern.sub('', text, 1)
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC.match(word):
+        return word
+    match = RV.match(word)
+    if match is None:
+        return word
+    prefix, rv = match.groups()
+
+    # Шаг 1: деепричастие, иначе возвратность и одно из
+    # прилагательного, глагола или существительного.
+    stripped = _strip(PERFECTIVE_GERUND, rv)
+    if stripped != rv:
+        rv = stripped
+    else:
+        rv = _strip(REFLEXIVE, rv)
+        stripped = _strip(ADJECTIVE, rv)
+        if stripped != rv:
+            rv = _strip(PARTICIPLE, stripped)
+        else:
+            stripped = _strip(VERB, rv)
+            rv = stripped if stripped != rv else _strip(NOUN, rv)
+
+    # Шаг 2-4: «и», словообразовательный суффикс, превосходная степень,
+    # двойная «н» и мягкий знак.
+    rv = _strip(I_ENDING, rv)
+    if DERIVATIONAL.match(rv):
+        rv = _strip(DERIVATIONAL_ENDING, rv)
+    stripped = _strip(SOFT_SIGN, rv)
+    if stripped != rv:
+        rv = stripped
+    else:
+        rv = _strip(SUPERLATIVE, rv)
+        rv = DOUBLE_N.sub('н', rv, 1)
+    return prefix + rv
+
+
+def stems(text):
+    """Основы всех слов текста по порядку."""
+    return [stem(word) for word in WORD.findall(text.lower())]
@@ -0,0 +1,384 @@
+"""Массовое наполнение базы для manage.py seed и замеров.
+
+Строки пишутся порциями по chunk_size, каждая порция — своя
+транзакция: мелкие таблицы через bulk_create, посты и комментарии
+через executemany готовых кортежей. Ни то, ни другое не шлёт
+post_save, так что обработчики posts.signals на время загрузки
+молчат: счётчики считаются тут же в памяти, ленты подписок и
+поисковый индекс пересобираются одним проходом в конце. Первичные
+ключи пользователей, групп и постов назначаются заранее, чтобы не
+перечитывать их из базы.
+
+Результат зависит только от seed. Тексты собираются из заранее
+сгенерированного Faker набора предложений: Faker на каждый из
+миллионов постов был бы медленнее самой вставки. Число постов автора,
+подписчиков у него и комментариев у поста распределено по Ципфу —
+немного «звёзд» и длинный хвост.
+"""
+import hashlib
+import io
+import random
+import time
+from array import array
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from users.models import Profile
+
+from . import bulk, cards, images, timeline, trending
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend as search_backend
+
+SENTENCES = 2000
+NAMES = 300
+UNGROUPED_SHARE = 0.2
+# Средняя задержка комментария после публикации поста, секунд.
+COMMENT_DELAY = 6 * 3600
+IMAGE_SIZE = (640, 480)
+# Кеш страниц SQLite на время загрузки, КБ. По умолчанию он 2 МБ, и
+# вторичные индексы постов при вставке постоянно читаются с диска.
+SQLITE_CACHE_KB = 512 * 1024
+
+
+def zipf_weights(size, skew):
+    """Накопленные веса рангов: вероятность ранга r ~ 1 / r ** skew."""
+    return array('d', accumulate(
+        1 / rank ** skew for rank in range(1, size + 1)
+    ))
+
+
+def shuffled(size, rng):
+    """Случайная перестановка 0..size-1 в компактном массиве."""
+    order = array('I', range(size))
+    rng.shuffle(order)
+    return order
+
+
+@contextmanager
+def sqlite_cache():
+    """Увеличенный кеш страниц SQLite на время загрузки; прежний
+    размер возвращается, чтобы не искажать замеры на том же
+    соединении."""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        previous = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_KB}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA cache_size = {previous}')
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+class Seeder:
+    def __init__(
+        self, users, groups, posts, comments, follows, seed=0, skew=1.1,
+        days=365, images=0.0, image_pool=20, prefix='seed',
+        password='password', batch_size=1000, chunk_size=50000,
+        log=None,
+    ):
+        self.users = users
+        self.groups = groups
+        self.posts = posts if users else 0
+        self.comments = comments if self.posts else 0
+        self.follows = min(follows, users * (users - 1))
+        self.skew = skew
+        self.days = days
+        self.images = images
+        self.image_pool = image_pool
+        self.prefix = prefix
+        self.password = password
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.rng = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.now = timezone.now()
+        self.first_date = self.now - timedelta(days=days)
+        self.posts_count = array('I', [0]) * users
+        self.followers_count = array('I', [0]) * users
+        self.following_count = array('I', [0]) * users
+
+    def pick(self, weights):
+        return bisect(weights, self.rng.random() * weights[-1])
+
+    def insert(self, model, objects):
+        """bulk_create порциями: chunk_size строк на транзакцию."""
+        objects = iter(objects)
+        batch_size = bulk.batch_size(model, self.batch_size)
+        total = 0
+        while True:
+            chunk = list(islice(objects, self.chunk_size))
+            if not chunk:
+                return total
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=batch_size)
+            total += len(chunk)
+
+    def insert_rows(self, model, fields, rows):
+        """executemany готовых кортежей, тоже порциями.
+
+        Для постов и комментариев: на миллионах строк сборка SQL и
+        подготовка значений в bulk_create обходятся дороже самой вставки.
+        """
+        quote = connection.ops.quote_name
+        columns = ', '.join(
+            quote(model._meta.get_field(name).column) for name in fields
+        )
+        placeholders = ', '.join(['%s'] * len(fields))
+        sql = (
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES ({placeholders})'
+        )
+        rows = iter(rows)
+        total = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return total
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, chunk)
+            total += len(chunk)
+
+    def stage(self, name, function):
+        started = time.perf_counter()
+        count = function()
+        self.log(
+            f'{name}: {count} за {time.perf_counter() - started:.1f} с'
+        )
+
+    def run(self, index_search=False, timelines=True):
+        if User.objects.filter(username=f'{self.prefix}0').exists():
+            raise ValueError(
+                f'Пользователи с префиксом «{self.prefix}» уже есть'
+            )
+        self.sentences = [self.fake.sentence() for _ in range(SENTENCES)]
+        with sqlite_cache():
+            self.stage('Пользователи', self.create_users)
+            self.stage('Группы', self.create_groups)
+            self.stage('Посты', self.create_posts)
+            self.stage('Комментарии', self.create_comments)
+            self.stage('Подписки', self.create_follows)
+            self.stage('Профили', self.create_profiles)
+            bulk.reset_sequences(User, Group, Post)
+            self.stage('Популярное', trending.rebuild)
+            if timelines:
+                self.stage('Записи лент', timeline.rebuild_all)
+        if index_search:
+            self.stage('Поисковый индекс', self.index_search)
+        cards.bump(cards.FEED, cards.FEED_ALL)
+
+    def create_users(self):
+        self.first_user = _next_pk(User)
+        password = make_password(self.password)
+        first_names = [self.fake.first_name() for _ in range(NAMES)]
+        last_names = [self.fake.last_name() for _ in range(NAMES)]
+        return self.insert(User, (
+            User(
+                pk=self.first_user + number,
+                username=f'{self.prefix}{number}',
+                password=password,
+                first_name=self.rng.choice(first_names),
+                last_name=self.rng.choice(last_names),
+            )
+            for number in range(self.users)
+        ))
+
+    def create_groups(self):
+        first = _next_pk(Group)
+        self.group_ids = range(first, first + self.groups)
+        return self.insert(Group, (
+            Group(
+                pk=pk,
+                title=self.fake.sentence(nb_words=3)[:200],
+                slug=f'{self.prefix}-{number}',
+                description=self.fake.text(max_nb_chars=200),
+            )
+            for number, pk in enumerate(self.group_ids)
+        ))
+
+    def post_date(self, index):
+        """Даты постов равномерно растут вместе с ключом."""
+        step = self.days * 86400 / max(self.posts, 1)
+        return self.first_date + timedelta(seconds=step * index)
+
+    @staticmethod
+    def db_date(value):
+        return connection.ops.adapt_datetimefield_value(value)
+
+    def text(self, longest):
+        return ' '.join(
+            self.rng.choices(self.sentences, k=self.rng.randint(1, longest))
+        )
+
+    def plan_comments(self):
+        """Каждому комментарию — индекс поста; заодно считает
+        comments_count, который пишется вместе с постом."""
+        self.commented = array('I')
+        self.comments_count = array('I', [0]) * self.posts
+        if not self.comments:
+            return
+        # Ранги популярности перемешаны, чтобы самыми обсуждаемыми не
+        # оказывались просто самые старые посты.
+        weights = zipf_weights(self.posts, self.skew)
+        ranked = shuffled(self.posts, self.rng)
+        for _ in range(self.comments):
+            index = ranked[self.pick(weights)]
+            self.commented.append(index)
+            self.comments_count[index] += 1
+
+    def create_posts(self):
+        self.plan_comments()
+        self.first_post = _next_pk(Post)
+        pool = self.create_images() if self.images else []
+        weights = zipf_weights(self.users, self.skew)
+        group_weights = zipf_weights(self.groups, self.skew)
+
+        def build(index):
+            author = self.pick(weights)
+            self.posts_count[author] += 1
+            group_id = None
+            if self.groups and self.rng.random() >= UNGROUPED_SHARE:
+                group_id = self.group_ids[self.pick(group_weights)]
+            image = image_hash = ''
+            if pool and self.rng.random() < self.images:
+                image, image_hash = self.rng.choice(pool)
+            return (
+                self.first_post + index,
+                self.text(6),
+                self.db_date(self.post_date(index)),
+                self.first_user + author,
+                group_id,
+                image,
+                image_hash,
+                self.comments_count[index],
+                0,
+            )
+
+        return self.insert_rows(Post, (
+            'id', 'text', 'pub_date', 'author', 'group', 'image',
+            'image_hash', 'comments_count', 'score',
+        ), map(build, range(self.posts)))
+
+    def create_images(self):
+        """Небольшой набор картинок, на который ссылаются посты, —
+        как после дедупликации в posts.images."""
+        storage = Post._meta.get_field('image').storage
+        pool = []
+        for number in range(self.image_pool):
+            picture = Image.new('RGB', IMAGE_SIZE, tuple(
+                self.rng.randrange(256) for _ in range(3)
+            ))
+            width, height = IMAGE_SIZE
+            ImageDraw.Draw(picture).ellipse(
+                (
+                    self.rng.randrange(width // 2),
+                    self.rng.randrange(height // 2),
+                    self.rng.randrange(width // 2, width),
+                    self.rng.randrange(height // 2, height),
+                ),
+                fill=tuple(self.rng.randrange(256) for _ in range(3)),
+            )
+            source = io.BytesIO()
+            picture.save(source, 'PNG')
+            content, extension = images.normalize(source)
+            name = storage.save(
+                f'posts/{self.prefix}-{number}.{extension}',
+                ContentFile(content),
+            )
+            pool.append((name, hashlib.sha256(content).hexdigest()))
+        return pool
+
+    def create_comments(self):
+        def build(index):
+            delay = self.rng.expovariate(1 / COMMENT_DELAY)
+            return (
+                self.first_post + index,
+                self.first_user + self.rng.randrange(self.users),
+                self.text(2),
+                self.db_date(min(
+                    self.post_date(index) + timedelta(seconds=delay),
+                    self.now,
+                )),
+            )
+
+        count = self.insert_rows(
+            Comment, ('post', 'author', 'text', 'created'),
+            map(build, self.commented),
+        )
+        del self.commented
+        return count
+
+    def follows_plan(self):
+        """Пары подписок без повторов: подписчик случайный, автор — по
+        Ципфу, так что у немногих авторов тысячи подписчиков.
+
+        Ранги популярности перемешаны независимо от рангов
+        плодовитости: самые читаемые авторы не обязательно пишут больше
+        всех. Иначе каждая подписка на плодовитого автора переносила бы
+        в ленту по TIMELINE_BACKFILL_LIMIT постов, и ленты разрастались
+        бы на порядки быстрее, чем в жизни.
+        """
+        weights = zipf_weights(self.users, self.skew)
+        ranked = shuffled(self.users, self.rng)
+        seen = set()
+        attempts = 0
+        while len(seen) < self.follows and attempts < self.follows * 20:
+            attempts += 1
+            user = self.rng.randrange(self.users)
+            author = ranked[self.pick(weights)]
+            pair = user * self.users + author
+            if user == author or pair in seen:
+                continue
+            seen.add(pair)
+            self.following_count[user] += 1
+            self.followers_count[author] += 1
+            yield Follow(
+                user_id=self.first_user + user,
+                author_id=self.first_user + author,
+            )
+
+    def create_follows(self):
+        return self.insert(Follow, self.follows_plan())
+
+    def create_profiles(self):
+        return self.insert(Profile, (
+            Profile(
+                user_id=self.first_user + number,
+                posts_count=self.posts_count[number],
+                followers_count=self.followers_count[number],
+                following_count=self.following_count[number],
+            )
+            for number in range(self.users)
+        ))
+
+    def index_search(self):
+        search_backend().rebuild()
+        return self.posts + self.comments
+
+
+def seed(users, groups, posts, comments, follows, seed=0, **options):
+    """Наполняет базу; index_search и timelines передаются в run()."""
+    index_search = options.pop('index_search', False)
+    timelines = options.pop('timelines', True)
+    Seeder(
+        users, groups, posts, comments, follows, seed=seed, **options
+    ).run(index_search=index_search, timelines=timelines)
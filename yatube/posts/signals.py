@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cards, counters, follows, search, timeline, trending
+from .search import get_backend as search_backend
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Поля пользователя, которые видны в карточках и лентах. Сохранения
+# только остальных (last_login при каждом входе, password) кеши не
+# сбрасывают.
+USER_DISPLAY_FIELDS = frozenset({'username', 'first_name', 'last_name'})
+# Поля поста, которые видны в лентах или меняют их состав.
+POST_FEED_FIELDS = frozenset({'text', 'pub_date', 'image', 'group', 'author'})
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_profile(instance.author_id, posts_count=1)
+        trending.post_created(instance)
+        timeline.fan_out.enqueue(
+            instance.pk, key=f'timeline:fan_out:{instance.pk}'
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, posts_count=-1)
+
+
+def _comments_changed(post_id):
+    # Счётчик комментариев виден на карточке поста во всех списках, но
+    # общее поколение лент трогать незачем: оно сбросило бы ещё и
+    # метки страниц всех постов.
+    cards.bump(cards.POST, post_id)
+    cards.bump(cards.COMMENTS, cards.FEED_ALL)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_comments(instance.post_id, 1)
+        trending.comment_added(instance.post_id)
+        _comments_changed(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+    _comments_changed(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_profile(instance.user_id, following_count=1)
+        counters.change_profile(instance.author_id, followers_count=1)
+        trending.follower_added(instance.author_id)
+        follows.invalidate(instance.user_id, instance.author_id)
+        timeline.add_author(instance.user_id, instance.author_id)
+        cards.bump(cards.PROFILE, instance.user_id)
+        cards.bump(cards.PROFILE, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_profile(instance.user_id, following_count=-1)
+    counters.change_profile(instance.author_id, followers_count=-1)
+    trending.follower_removed(instance.author_id)
+    follows.invalidate(instance.user_id, instance.author_id)
+    timeline.remove_author(instance.user_id, instance.author_id)
+    cards.bump(cards.PROFILE, instance.user_id)
+    cards.bump(cards.PROFILE, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, update_fields=None, **kwargs):
+    cards.bump(cards.POST, instance.pk)
+    if update_fields is not None and not (
+        POST_FEED_FIELDS & set(update_fields)
+    ):
+        return
+    cards.bump(cards.FEED, cards.FEED_ALL)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    cards.bump(cards.GROUP, instance.pk)
+    cards.bump(cards.FEED, cards.FEED_ALL)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None,
+                 **kwargs):
+    if created:
+        # У нового пользователя ещё нет постов ни в одной ленте.
+        return
+    if update_fields is not None and not (
+        USER_DISPLAY_FIELDS & set(update_fields)
+    ):
+        return
+    cards.bump(cards.USER, instance.pk)
+    cards.bump(cards.FEED, cards.FEED_ALL)
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    search.index_post.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    search_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_indexed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_comment.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unindexed(sender, instance, **kwargs):
+    search_backend().remove_comment(instance.pk)
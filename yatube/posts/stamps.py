@@ -0,0 +1,81 @@
+"""Дешёвые метки версий страниц и лент для conditional GET.
+
+Метка — поколения из posts.cards плюс, где есть, дата последней
+записи; всё это достаётся из кеша или одним запросом по индексу.
+"""
+from django.db.models import Max
+
+from . import cards
+from .models import Comment, Post, User
+from .timeline import timeline_posts
+
+
+def _latest(posts):
+    return posts.order_by().aggregate(latest=Max('pub_date'))['latest']
+
+
+def feed(request, *args, **kwargs):
+    return (cards.list_generation(),)
+
+
+def popular(request):
+    """Лента популярного зависит ещё и от рейтингов постов."""
+    return (cards.popular_generation(),)
+
+
+def latest_post(request):
+    return _latest(Post.objects.all())
+
+
+def latest_group_post(request, slug):
+    return _latest(Post.objects.filter(group__slug=slug))
+
+
+def latest_author_post(request, username):
+    return _latest(Post.objects.filter(author__username=username))
+
+
+def profile(request, username):
+    """Лента автора, его счётчики подписок и подписки зрителя."""
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    parts = [cards.list_generation(), author_id]
+    if author_id is not None:
+        parts.append(cards.generation(cards.PROFILE, author_id))
+    if request.user.is_authenticated:
+        parts.append(cards.generation(cards.PROFILE, request.user.pk))
+    return parts
+
+
+def post(request, post_id):
+    return cards.feed_generation(), cards.generation(cards.POST, post_id)
+
+
+def post_page(request, post_id):
+    """Страница поста ещё показывает, подписан ли зритель на автора."""
+    parts = list(post(request, post_id))
+    if request.user.is_authenticated:
+        parts.append(cards.generation(cards.PROFILE, request.user.pk))
+    return parts
+
+
+def latest_comment(request, post_id):
+    return Comment.objects.filter(post_id=post_id).aggregate(
+        latest=Max('created')
+    )['latest']
+
+
+def comments(request, post_id):
+    return (cards.generation(cards.POST, post_id),)
+
+
+def timeline(request):
+    return (
+        cards.list_generation(),
+        cards.generation(cards.PROFILE, request.user.pk),
+    )
+
+
+def latest_timeline_post(request):
+    return _latest(timeline_posts(request.user))
@@ -0,0 +1,12 @@
+from django import template
+
+from posts import follows as follow_graph
+
+register = template.Library()
+
+
+@register.filter
+def follows(user, author):
+    """{% if user|follows:author %} — без запроса, по множеству
+    подписок пользователя."""
+    return follow_graph.is_following(user.pk, author.pk)
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.bench import regressions
+
+SCENARIOS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'post_create', 'add_comment',
+)
+
+
+class BenchCommandTests(TestCase):
+    def test_bench_on_current_db(self):
+        """Команда наполняет базу, меряет сценарии и сохраняет итог"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            out = StringIO()
+            call_command(
+                'bench', '--current-db', '--mode', 'client',
+                users=4, groups=2, posts=15, comments=10, follows=5,
+                requests=2, save=path, stdout=out,
+            )
+            with open(path) as baseline_file:
+                results = json.load(baseline_file)
+        self.assertEqual(set(results), set(SCENARIOS))
+        summary = results['profile']['client']
+        for field in ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_kb'):
+            with self.subTest(field=field):
+                self.assertIn(field, summary)
+
+    def test_regressions(self):
+        """Рост p95 сверх допуска и лишние SQL — регрессии"""
+        baseline = {'index': {'client': {'p95_ms': 10, 'queries': 2}}}
+        slower = {'index': {'client': {'p95_ms': 20, 'queries': 3}}}
+        self.assertEqual(len(regressions(slower, baseline, 0.25)), 2)
+        self.assertEqual(regressions(baseline, baseline, 0.25), [])
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as file:
+            json.dump({
+                'index': {'client': {'p95_ms': 0.001, 'queries': 0}},
+            }, file)
+            file.flush()
+            with self.assertRaises(CommandError):
+                call_command(
+                    'bench', '--current-db', '--mode', 'client',
+                    '--scenario', 'index', users=2, groups=1, posts=2,
+                    comments=1, follows=1, requests=2,
+                    compare=file.name, stdout=StringIO(),
+                )
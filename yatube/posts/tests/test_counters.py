@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from users.models import Profile
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='CountedAuthor')
+        cls.reader = User.objects.create_user(username='CountedReader')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Создание и удаление постов и комментариев меняют счётчики"""
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Пост'}
+        )
+        post = Post.objects.get(author=self.author)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.reader_client.post(
+            reverse('posts:add_comment', args=(post.pk,)),
+            data={'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        post.comments.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+    def test_edit_keeps_comments_count(self):
+        """Сохранение поста не затирает счётчик комментариев"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        stale = Post.objects.get(pk=post.pk)
+        post.comments.create(author=self.reader, text='Комментарий')
+        stale.text = 'Правка'
+        stale.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_save_deferred_post(self):
+        """Пост из .only() сохраняется без догрузки отложенных полей"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        partial = Post.objects.only('text').get(pk=post.pk)
+        partial.text = 'Правка'
+        deferred = partial.get_deferred_fields()
+        partial.save()
+        self.assertEqual(partial.get_deferred_fields(), deferred)
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Правка')
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обоих пользователей"""
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        response = self.reader_client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertEqual(response.context['followers_count'], 1)
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_reconcile_command(self):
+        """Команда сверки исправляет разошедшиеся счётчики"""
+        Post.objects.create(text='Пост', author=self.author)
+        Profile.objects.filter(user=self.author).update(posts_count=42)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.profile(self.author).posts_count, 1)
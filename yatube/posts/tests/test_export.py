@@ -0,0 +1,122 @@
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import export
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост, «{number}»', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        cls.other_post = Post.objects.create(text='Чужой', author=cls.other)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.other, text='Комментарий'
+        )
+        Post.objects.filter(pk=cls.other_post.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=10)
+        )
+
+    def export(self, kind=export.POSTS, export_format=export.CSV, **filters):
+        return ''.join(export.stream(kind, export_format, **filters))
+
+    def test_csv_filters_by_group_and_author(self):
+        """CSV по группе и автору: заголовок и строки в порядке pk"""
+        rows = list(csv.DictReader(io.StringIO(
+            self.export(group='group', author='writer')
+        )))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [post.pk for post in self.posts],
+        )
+        self.assertEqual(rows[1]['text'], 'Пост, «1»')
+        self.assertEqual(rows[0]['comments_count'], '1')
+
+    def test_jsonl_date_range(self):
+        """JSON Lines с фильтром по датам включительно"""
+        today = timezone.localdate()
+        old_day = today - datetime.timedelta(days=10)
+        lines = self.export(
+            export_format=export.JSONL, since=old_day, until=old_day
+        ).splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['id'], self.other_post.pk)
+        self.assertIsNone(record['group'])
+        recent = self.export(export_format=export.JSONL, since=today)
+        self.assertEqual(len(recent.splitlines()), 5)
+
+    def test_comments_by_group(self):
+        """Комментарии фильтруются по группе поста"""
+        lines = self.export(
+            export.COMMENTS, export.JSONL, group='group'
+        ).splitlines()
+        self.assertEqual(json.loads(lines[0])['post'], self.posts[0].pk)
+        self.assertEqual(self.export(export.COMMENTS, group='none'), (
+            'id,created,post,author,group,text\r\n'
+        ))
+
+    def test_stream_is_chunked(self):
+        """Выгрузка отдаётся кусками по EXPORT_CHUNK_SIZE строк"""
+        chunks = list(export.stream(export.POSTS, export.JSONL))
+        self.assertEqual(len(chunks), 3)
+
+    def test_view_is_staff_only(self):
+        """Выгрузка доступна только персоналу"""
+        url = reverse('posts:export')
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(url, {'format': 'jsonl', 'author': 'other'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(json.loads(body)['author'], 'other')
+        self.assertEqual(
+            client.get(url, {'since': 'вчера'}).status_code, 400
+        )
+
+    def test_command(self):
+        """Команда пишет выгрузку в файл и проверяет параметры"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.csv')
+            call_command('export', '--group', 'group', '-o', path)
+            with open(path, encoding='utf-8', newline='') as output:
+                self.assertEqual(len(list(csv.reader(output))), 6)
+        out = StringIO()
+        call_command('export', 'comments', '--format', 'jsonl', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+        with self.assertRaises(CommandError):
+            call_command(
+                'export', '--since', '2021-02-01', '--until', '2021-01-01',
+                stdout=StringIO(),
+            )
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follows
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_sets_are_cached(self):
+        """Множества читаются одним запросом и дальше из кеша"""
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                follows.is_following(self.reader.pk, self.author.pk)
+            )
+            self.assertFalse(
+                follows.is_following(self.reader.pk, self.stranger.pk)
+            )
+        self.assertEqual(follows.followers(self.author.pk), {self.reader.pk})
+        self.assertEqual(follows.followees(self.author.pk), set())
+        with self.assertNumQueries(0):
+            follows.followers(self.author.pk)
+        self.assertFalse(follows.is_following(None, self.author.pk))
+
+    def test_profile_following_is_per_author(self):
+        """Кнопка подписки зависит от пары зритель — автор"""
+        def following(user):
+            response = self.client.get(
+                reverse('posts:profile', args=(user.username,))
+            )
+            return response.context['following']
+
+        self.assertTrue(following(self.author))
+        self.assertFalse(following(self.stranger))
+
+    def test_follow_and_unfollow_invalidate(self):
+        """Подписка и отписка сразу видны в графе"""
+        self.assertFalse(
+            follows.is_following(self.reader.pk, self.stranger.pk)
+        )
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.stranger.username,))
+        )
+        self.assertTrue(
+            follows.is_following(self.reader.pk, self.stranger.pk)
+        )
+        self.assertIn(self.reader.pk, follows.followers(self.stranger.pk))
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(self.stranger.username,))
+        )
+        self.assertFalse(
+            follows.is_following(self.reader.pk, self.stranger.pk)
+        )
+        self.assertEqual(follows.followers(self.stranger.pk), set())
+
+    def test_follow_ignores_stale_cache(self):
+        """Устаревший кеш «уже подписан» не теряет подписку"""
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        cache.set(
+            follows._key(follows.FOLLOWEES, self.reader.pk),
+            frozenset({self.author.pk}),
+        )
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+
+    def test_follow_unknown_author(self):
+        """Подписка на несуществующего пользователя — 404"""
+        response = self.client.get(
+            reverse('posts:profile_follow', args=('nobody',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_detail_badge(self):
+        """На странице поста видно, что зритель подписан на автора"""
+        followed = Post.objects.create(text='Текст', author=self.author)
+        other = Post.objects.create(text='Текст', author=self.stranger)
+        self.assertContains(
+            self.client.get(
+                reverse('posts:post_detail', args=(followed.pk,))
+            ),
+            'вы подписаны',
+        )
+        self.assertNotContains(
+            self.client.get(reverse('posts:post_detail', args=(other.pk,))),
+            'вы подписаны',
+        )
@@ -0,0 +1,90 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+def make_photo(size=(3000, 2000), color='red'):
+    image = Image.new('RGB', size, color)
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'
+    output = io.BytesIO()
+    image.save(output, 'JPEG', exif=exif, quality=95)
+    return SimpleUploadedFile(
+        'photo.jpg', output.getvalue(), content_type='image/jpeg'
+    )
+
+
+def make_palette_png():
+    image = Image.new('P', (40, 40), 0)
+    image.putpalette([255, 0, 0] + [0, 0, 255] * 255)
+    image.paste(1, (0, 0, 20, 40))
+    output = io.BytesIO()
+    image.save(output, 'PNG', transparency=0)
+    return SimpleUploadedFile(
+        'logo.png', output.getvalue(), content_type='image/png'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PhoneUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def upload(self, photo):
+        self.client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Фото', 'image': photo},
+        )
+        return Post.objects.filter(author=self.author).first()
+
+    def test_photo_is_resized_and_stripped(self):
+        """Большое фото уменьшается и теряет EXIF"""
+        post = self.upload(make_photo())
+        with Image.open(post.image.path) as stored:
+            self.assertLessEqual(
+                max(stored.size), max(settings.POST_IMAGE_MAX_SIZE)
+            )
+            self.assertEqual(stored.format, settings.POST_IMAGE_FORMAT)
+            self.assertFalse(stored.getexif())
+        self.assertEqual(len(post.image_hash), 64)
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся одним файлом"""
+        first = self.upload(make_photo())
+        second = self.upload(make_photo())
+        other = self.upload(make_photo(color='blue'))
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+
+    def test_palette_png_keeps_transparency(self):
+        """Прозрачность палитровой PNG сохраняется"""
+        post = self.upload(make_palette_png())
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'PNG')
+            stored = stored.convert('RGBA')
+            self.assertEqual(stored.getpixel((30, 20))[3], 0)
+            self.assertEqual(stored.getpixel((5, 20)), (0, 0, 255, 255))
@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import bulk, export, importer
+from posts.models import Comment, Group, Post
+from users.models import Profile
+
+User = get_user_model()
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, records):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def load(self, path, *args):
+        call_command(
+            'import_posts', path, *args, verbosity=0, stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+    def test_explicit_dates_are_scoped(self):
+        """Явные даты действуют только внутри блока и не обнуляют дату
+        поста, созданного без неё"""
+        date = timezone.make_aware(datetime(2020, 1, 2))
+        with bulk.explicit_dates():
+            Post.objects.bulk_create([
+                Post(author=self.author, text='Старый', pub_date=date)
+            ])
+            fresh = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(Post.objects.get(text='Старый').pub_date, date)
+        self.assertIsNotNone(fresh.pub_date)
+        dated = Post.objects.create(
+            author=self.author, text='Вне блока', pub_date=date
+        )
+        self.assertNotEqual(dated.pub_date, date)
+
+    def test_posts_and_comments(self):
+        """Посты с id и комментарии к ним импортируются, счётчики верны"""
+        posts = self.write('posts.jsonl', [
+            {'id': 500, 'author': 'writer', 'group': 'group',
+             'text': 'Импортированный', 'pub_date': '2020-01-02T03:04:05'},
+            {'id': 501, 'author': 'writer', 'text': 'Второй'},
+        ])
+        self.load(posts)
+        post = Post.objects.get(pk=500)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, 2
+        )
+        comments = self.write('comments.jsonl', [
+            {'post': 500, 'author': 'writer', 'text': 'Отлично'},
+        ])
+        self.load(comments, '--kind', 'comments')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Comment.objects.get().text, 'Отлично')
+
+    def test_invalid_rows_are_rejected(self):
+        """Пустой текст, неизвестный автор и занятый id отклоняются"""
+        Post.objects.create(pk=7, text='Есть', author=self.author)
+        path = self.write('posts.jsonl', [
+            {'author': 'writer', 'text': ''},
+            {'author': 'nobody', 'text': 'Текст'},
+            {'id': 7, 'author': 'writer', 'text': 'Текст'},
+            {'author': 'writer', 'group': 'nogroup', 'text': 'Текст'},
+            {'author': 'writer', 'text': 'Годный'},
+        ])
+        errors = os.path.join(self.directory, 'errors.jsonl')
+        self.load(path, '--errors', errors)
+        self.assertEqual(Post.objects.count(), 2)
+        with open(errors, encoding='utf-8') as errors_file:
+            rejected = [json.loads(line) for line in errors_file]
+        self.assertEqual(
+            [(item['row'], sorted(item['errors'])) for item in rejected],
+            [(1, ['text']), (2, ['author']), (3, ['id']), (4, ['group'])],
+        )
+
+    def test_create_missing(self):
+        """С --create-missing неизвестные авторы и группы создаются"""
+        path = self.write('posts.jsonl', [
+            {'author': 'newcomer', 'group': 'new-group', 'text': 'Текст'},
+        ])
+        self.load(path, '--create-missing')
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.author.profile.posts_count, 1)
+        self.assertEqual(post.group.slug, 'new-group')
+
+    def test_round_trip_csv(self):
+        """Выгрузка в CSV заливается обратно без потерь"""
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=self.author, group=self.group
+            )
+        path = os.path.join(self.directory, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            output.writelines(export.stream(export.POSTS, export.CSV))
+        before = list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'group'
+        ))
+        Post.objects.all().delete()
+        self.load(path)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'group'
+        )), before)
+
+    def test_resume_from_checkpoint(self):
+        """Импорт продолжается с контрольной точки"""
+        path = self.write('posts.jsonl', [
+            {'author': 'writer', 'text': f'Пост {number}'}
+            for number in range(5)
+        ])
+        checkpoint = importer.Checkpoint(f'{path}.checkpoint', path)
+        checkpoint.rows = checkpoint.imported = 3
+        checkpoint.save()
+        self.load(path, '--resume', '--batch-size', '1')
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+        checkpoint.size += 1
+        checkpoint.save()
+        with self.assertRaises(CommandError):
+            self.load(path, '--resume')
@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from django.test import TestCase
 
-from ..models import Group, Post, TEXT_LIMIT
+from ..models import Follow, Group, Post, TEXT_LIMIT
 
 User = get_user_model()
 
@@ -57,3 +58,10 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора запрещена."""
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=PostModelTest.user)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=follower, author=PostModelTest.user)
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.paginator import CursorPaginator
+
+User = get_user_model()
+
+POSTS_TOTAL = 13
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='CursorAuthor')
+        cls.group = Group.objects.create(
+            title='Группа курсоров',
+            slug='cursor-group',
+            description='Тестовое описание группы',
+        )
+        for number in range(POSTS_TOTAL):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.author,
+                group=cls.group,
+            )
+        # Одинаковая дата публикации: порядок держится на id.
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.ordered = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_pages_follow_each_other_without_gaps(self):
+        """Страницы по курсору идут подряд без пропусков и повторов"""
+        paginator = CursorPaginator(Post.objects.all(), settings.POSTS_AMOUNT)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(list(first), self.ordered[:settings.POSTS_AMOUNT])
+        self.assertEqual(list(second), self.ordered[settings.POSTS_AMOUNT:])
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        """Подделанный курсор отдаёт первую страницу"""
+        paginator = CursorPaginator(Post.objects.all(), settings.POSTS_AMOUNT)
+        cursor = paginator.get_page().next_cursor
+        page = paginator.get_page(cursor[:-1] + 'x')
+        self.assertEqual(list(page), self.ordered[:settings.POSTS_AMOUNT])
+
+    def test_numbered_page_methods_degrade(self):
+        """Методы номеров страниц у курсора возвращают None"""
+        page = CursorPaginator(
+            Post.objects.all(), settings.POSTS_AMOUNT
+        ).get_page()
+        self.assertIsNone(page.next_page_number())
+        self.assertIsNone(page.previous_page_number())
+        self.assertIsNone(page.start_index())
+        self.assertIsNone(page.end_index())
+
+    def test_approximate_total(self):
+        """Приблизительное число записей считается только по запросу"""
+        paginator = CursorPaginator(Post.objects.all(), settings.POSTS_AMOUNT)
+        self.assertIsNone(paginator.count)
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.POSTS_AMOUNT, approximate_total=True
+        )
+        self.assertEqual(paginator.count, POSTS_TOTAL)
+
+    def test_feed_views_accept_cursor(self):
+        """Ленты листаются параметром ?cursor="""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                page_obj = self.client.get(url).context['page_obj']
+                self.assertEqual(len(page_obj), settings.POSTS_AMOUNT)
+                response = self.client.get(
+                    url, {'cursor': page_obj.next_cursor}
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    POSTS_TOTAL - settings.POSTS_AMOUNT
+                )
+                self.assertContains(response, 'Предыдущая')
+
+
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Commenter')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.author)
+        for number in range(settings.COMMENTS_AMOUNT + 5):
+            cls.post.comments.create(
+                author=cls.author, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_detail_shows_newest_comments_only(self):
+        """На странице поста только последние комментарии"""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_AMOUNT)
+        self.assertEqual(
+            comments[0].text, f'Комментарий {settings.COMMENTS_AMOUNT + 4}'
+        )
+        self.assertContains(response, 'Показать ещё комментарии')
+
+    def test_comments_endpoint(self):
+        """Следующая страница приходит фрагментом или JSON"""
+        cursor = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        ).context['comments'].next_cursor
+        url = reverse('posts:comments', args=(self.post.pk,))
+        response = self.client.get(url, {'cursor': cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertNotContains(response, '<html')
+        self.assertContains(response, 'Комментарий 0')
+        data = self.client.get(
+            url, {'cursor': cursor, 'format': 'json'}
+        ).json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryCountTests(TestCase):
+    """Число запросов представления не зависит от объёма данных."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='QueryAuthor', first_name='Имя', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(username='QueryReader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='query-group', description='Описание'
+        )
+        # Больше одной страницы, чтобы навигация была с самого начала.
+        for _ in range(settings.POSTS_AMOUNT + 1):
+            cls.post = Post.objects.create(
+                text='Пост', author=cls.author, group=cls.group
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        return len(context)
+
+    def assertQueriesConstant(self, url, grow):
+        """Проверяет, что после grow() запросов столько же."""
+        before = self.count_queries(url)
+        grow()
+        self.assertEqual(self.count_queries(url), before, url)
+
+    def add_comments(self):
+        for number in range(5):
+            commenter = User.objects.create_user(username=f'Commenter{number}')
+            Comment.objects.create(
+                post=self.post, author=commenter, text='Комментарий'
+            )
+
+    def add_posts(self):
+        for number in range(User.objects.count(), User.objects.count() + 5):
+            writer = User.objects.create_user(username=f'Writer{number}')
+            Follow.objects.create(user=self.reader, author=writer)
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='Описание',
+            )
+            Post.objects.create(text='Пост', author=writer, group=group)
+            Post.objects.create(text='Пост', author=self.author,
+                                group=self.group)
+
+    def test_post_detail_does_not_depend_on_comments(self):
+        self.assertQueriesConstant(
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            self.add_comments,
+        )
+
+    def test_feeds_do_not_depend_on_posts(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertQueriesConstant(url, self.add_posts)
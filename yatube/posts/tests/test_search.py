@@ -0,0 +1,125 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post
+from posts.search import SearchPaginator, get_backend
+from posts.search.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к общей основе"""
+        cases = (
+            ('котики', 'котиков', 'котик'),
+            ('гуляли', 'гуляет', 'гулять'),
+            ('красивая', 'красивые', 'красивый'),
+        )
+        for forms in cases:
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(word) for word in forms}), 1)
+
+    def test_latin_words_are_lowercased(self):
+        """Латиница только приводится к нижнему регистру"""
+        self.assertEqual(stem('Django'), 'django')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Searcher')
+        cls.cats = Post.objects.create(
+            text='Котики гуляли по крышам', author=cls.author
+        )
+        cls.dogs = Post.objects.create(
+            text='Собака лает, караван идёт', author=cls.author
+        )
+        cls.dogs.comments.create(author=cls.author, text='Мой кот согласен')
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query):
+        return [pk for pk, _ in get_backend().search(query, 10)]
+
+    def test_search_finds_word_forms_in_posts_and_comments(self):
+        """Поиск находит другие формы слова в постах и комментариях"""
+        self.assertEqual(self.found('котик'), [self.cats.pk])
+        self.assertEqual(self.found('гуляет'), [self.cats.pk])
+        self.assertCountEqual(
+            self.found('кот'), [self.cats.pk, self.dogs.pk]
+        )
+        self.assertEqual(self.found('слон'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Правка и удаление постов и комментариев обновляют индекс"""
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = 'Слоны гуляли по крышам'
+        cats.save()
+        self.assertEqual(self.found('слон'), [cats.pk])
+        self.assertEqual(self.found('кот'), [self.dogs.pk])
+        self.dogs.comments.all().delete()
+        self.assertEqual(self.found('кот'), [])
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_fresh_posts_rank_higher(self):
+        """При равной релевантности свежий пост выше старого"""
+        old = Post.objects.create(text='Ёжики в тумане', author=self.author)
+        new = Post.objects.create(text='Ёжики в тумане', author=self.author)
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - datetime.timedelta(days=365)
+        )
+        self.assertEqual(self.found('ежик'), [new.pk, old.pk])
+
+    def test_paginator_walks_all_results(self):
+        """Курсор проходит выдачу без пропусков и повторов"""
+        for number in range(5):
+            Post.objects.create(
+                text=f'Енот номер {number}', author=self.author
+            )
+        paginator = SearchPaginator('енот', 2)
+        seen = []
+        page = paginator.get_page()
+        while True:
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            page = SearchPaginator('енот', 2).get_page(page.next_cursor)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+        back = SearchPaginator('енот', 2).get_page(page.previous_cursor)
+        self.assertEqual([post.pk for post in back], seen[2:4])
+
+    def test_search_page(self):
+        """Страница поиска показывает карточки найденных постов"""
+        response = self.client.get(reverse('posts:search'), {'q': 'котики'})
+        self.assertEqual(list(response.context['page_obj']), [self.cats])
+        self.assertContains(response, 'Котики гуляли по крышам')
+        response = self.client.get(reverse('posts:search'), {'q': 'слон'})
+        self.assertContains(response, 'ничего не найдено')
+
+    def test_rebuild_command(self):
+        """Команда перестраивает потерянный индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        self.assertEqual(self.found('котик'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('котик'), [self.cats.pk])
+
+    @override_settings(
+        POSTS_SEARCH_BACKEND='posts.search.backends.DatabaseSearchBackend'
+    )
+    def test_database_backend(self):
+        """Запасной бэкенд ищет подстрокой в постах и комментариях"""
+        self.assertEqual(self.found('крышам'), [self.cats.pk])
+        self.assertEqual(self.found('согласен'), [self.dogs.pk])
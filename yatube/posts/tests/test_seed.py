@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from posts import counters, seeding, timeline
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        call_command(
+            'seed', users=30, groups=3, posts=300, comments=500,
+            follows=120, stdout=StringIO(), **options,
+        )
+
+    def test_counts_and_denormalized_data(self):
+        """Команда создаёт объекты, и счётчики с лентами сходятся"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 500)
+        self.assertEqual(Follow.objects.count(), 120)
+        self.assertEqual(counters.reconcile_posts(), 0)
+        self.assertEqual(counters.reconcile_profiles(), 0)
+        entries = set(TimelineEntry.objects.values_list('user', 'post'))
+        for user_id in Follow.objects.values_list('user', flat=True):
+            timeline.rebuild(user_id)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('user', 'post')), entries
+        )
+
+    def test_dates_and_skew(self):
+        """Даты разложены по времени, посты сосредоточены у немногих"""
+        self.seed(days=30)
+        dates = list(Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True
+        ))
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreater((dates[-1] - dates[0]).days, 28)
+        top = User.objects.order_by('-profile__posts_count').first()
+        self.assertGreater(top.profile.posts_count, 300 / 30 * 3)
+
+    def test_same_seed_same_data(self):
+        """Тот же seed даёт те же данные"""
+        def snapshot():
+            return list(Post.objects.order_by('pk').values_list(
+                'text', 'author__username', 'group__slug', 'comments_count'
+            ))
+
+        self.seed(seed=7)
+        first = snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed(seed=7)
+        self.assertEqual(snapshot(), first)
+
+    def test_images(self):
+        """Синтетические картинки общие для постов, как после
+        дедупликации"""
+        self.seed(images=1.0, image_pool=2)
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 2)
+        post = Post.objects.first()
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertEqual(len(post.image_hash), 64)
+
+    def test_prefix_collision(self):
+        """Повтор с тем же префиксом отклоняется"""
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+    def test_zipf_weights(self):
+        """Первый ранг вероятнее последнего"""
+        weights = seeding.zipf_weights(100, 1.1)
+        self.assertEqual(len(weights), 100)
+        self.assertGreater(weights[0], weights[-1] - weights[-2])
@@ -0,0 +1,112 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Writer')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def follow(self):
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        """Подписка переносит старые посты, новые раздаются при записи"""
+        self.follow()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=self.old_post
+        ).exists())
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=new_post
+        ).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_clears_timeline(self):
+        """Отписка убирает посты автора из ленты"""
+        self.follow()
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_read_on_demand(self):
+        """Посты «звёздного» автора читаются без раздачи"""
+        self.follow()
+        cache.clear()
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=new_post).exists())
+        self.assertIn(new_post, self.feed())
+
+    def test_rebuild_command(self):
+        """Команда пересобирает ленту по подпискам"""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(), [self.old_post])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=1)
+    def test_rebuild_all_limits_backfill(self):
+        """Полная пересборка переносит не больше
+        TIMELINE_BACKFILL_LIMIT постов автора, остальные читаются
+        напрямую"""
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        self.assertEqual(timeline.rebuild_all(), 1)
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2, POSTS_AMOUNT=2)
+    def test_history_past_backfill_limit(self):
+        """Лента листается за границу переноса без пропусков"""
+        other = User.objects.create_user(username='Other')
+        Post.objects.create(text='Пост другого', author=other)
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        self.follow()
+        Follow.objects.create(user=self.follower, author=other)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 3
+        )
+        expected = list(Post.objects.filter(
+            author__in=(self.author, other)
+        ).order_by('-pub_date', '-id'))
+        shown = []
+        url = reverse('posts:follow_index')
+        while url:
+            page = self.client.get(url).context['page_obj']
+            shown.extend(page)
+            url = page.next_cursor and (
+                reverse('posts:follow_index') + f'?cursor={page.next_cursor}'
+            )
+        self.assertEqual(shown, expected)
@@ -0,0 +1,122 @@
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import trending
+from posts.models import Comment, Follow, Post, TrendingEpoch
+
+User = get_user_model()
+
+
+@override_settings(
+    TRENDING_POST_WEIGHT=1.0, TRENDING_REACH_WEIGHT=0.0,
+    TRENDING_COMMENT_WEIGHT=1.0, TRENDING_FOLLOW_WEIGHT=0.5,
+    TRENDING_HALF_LIFE=3600,
+)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.quiet = Post.objects.create(author=self.author, text='Тихий')
+        self.talked = Post.objects.create(
+            author=self.author, text='Обсуждаемый'
+        )
+
+    def score(self, post):
+        post.refresh_from_db()
+        return post.score
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.reader, text='Да')
+
+    def shift_epoch(self, seconds):
+        TrendingEpoch.objects.update(started=time.time() - seconds)
+        cache.clear()
+
+    def test_comments_raise_post(self):
+        """Обсуждаемый пост поднимается в популярном выше тихого"""
+        self.assertAlmostEqual(self.score(self.quiet), 1.0, places=2)
+        self.comment(self.talked, 2)
+        self.assertAlmostEqual(self.score(self.talked), 3.0, places=2)
+        response = Client().get(reverse('posts:popular'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.talked, self.quiet]
+        )
+
+    def test_newer_events_weigh_more(self):
+        """Через период полураспада событие весит вдвое больше"""
+        self.shift_epoch(3600)
+        self.comment(self.quiet)
+        self.assertAlmostEqual(self.score(self.quiet), 3.0, places=2)
+
+    def test_follow_raises_recent_posts(self):
+        """Новый подписчик поднимает свежие посты автора"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertAlmostEqual(self.score(self.quiet), 1.5, places=2)
+
+    def test_unfollow_takes_reach_back(self):
+        """Отписка забирает вклад подписки, рейтинг не уходит ниже нуля"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        follow.delete()
+        self.assertAlmostEqual(self.score(self.quiet), 1.0, places=2)
+
+    def test_popular_etag_follows_scores(self):
+        """Метка страницы популярного меняется вместе с рейтингами"""
+        client = Client()
+        url = reverse('posts:popular')
+        etag = client.get(url)['ETag']
+        self.comment(self.quiet)
+        self.assertNotEqual(client.get(url)['ETag'], etag)
+        etag = client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        following = client.get(url)
+        self.assertNotEqual(following['ETag'], etag)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertNotEqual(client.get(url)['ETag'], following['ETag'])
+
+    def test_renormalize(self):
+        """Сдвиг эпохи сохраняет порядок и обнуляет затухшие рейтинги"""
+        self.comment(self.talked, 2)
+        self.shift_epoch(3600)
+        trending.renormalize()
+        self.assertAlmostEqual(self.score(self.talked), 1.5, places=2)
+        self.assertAlmostEqual(self.score(self.quiet), 0.5, places=2)
+        self.comment(self.quiet)
+        self.assertAlmostEqual(self.score(self.quiet), 1.5, places=2)
+        self.shift_epoch(3600 * 20)
+        trending.renormalize()
+        self.assertFalse(Post.objects.trending().exists())
+
+    def test_old_epoch_renormalized_on_write(self):
+        """Устаревшая эпоха сдвигается фоновой задачей при записи"""
+        self.shift_epoch(3600 * 48)
+        with self.settings(TASKS_ALWAYS_EAGER=True):
+            self.comment(self.talked)
+        started = TrendingEpoch.objects.get().started
+        self.assertLess(time.time() - started, 60)
+        self.assertAlmostEqual(self.score(self.talked), 1.0, places=2)
+
+    def test_rebuild(self):
+        """Пересчёт с нуля совпадает с накопленным рейтингом"""
+        self.comment(self.talked, 3)
+        expected = self.score(self.talked)
+        Post.objects.update(score=0)
+        call_command('renormalize_trending', '--rebuild', stdout=StringIO())
+        self.assertAlmostEqual(self.score(self.talked), expected, places=2)
+        self.assertAlmostEqual(self.score(self.quiet), 1.0, places=2)
+
+    def test_page_reads_index(self):
+        """Популярное читается по частичному индексу рейтинга"""
+        plan = Post.objects.trending().order_by('-score', '-id')[:11]
+        self.assertIn('post_trending_idx', plan.explain())
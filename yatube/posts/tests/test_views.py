@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
@@ -9,6 +10,7 @@ from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
+from posts import cards
 from posts.forms import PostForm
 from posts.models import Post, Group, Comment, Follow
 
@@ -19,7 +21,6 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
-        super().setUpClass()
         super().setUpClass()
         cls.author_of_post = User.objects.create_user(username="TestAuthor")
         cls.group = Group.objects.create(
@@ -215,29 +216,92 @@ class PostPagesTests(TestCase):
         self.assertNotContains(response, comments['text'])
 
     def test_cache_index(self):
-        """Тест, который проверяют работу кеша на главной странице"""
+        """Карточки берутся из кеша, а правки видны сразу"""
+        Post.objects.filter(pk=self.post.pk).update(text='Старый текст')
+        self.client_for_author_of_post.get(reverse('posts:index'))
+        # update() обходит сигналы: карточка остаётся прежней.
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
         response = self.client_for_author_of_post.get(reverse('posts:index'))
-        count_of_orig_resp = response.content
-        Post.objects.create(
+        self.assertContains(response, 'Старый текст')
+        new_post = Post.objects.create(
             text="Ещё один пост",
             author=self.author_of_post
         )
-        response_after_create_new_post = self.client_for_author_of_post.get(
-            reverse('posts:index')
+        response = self.client_for_author_of_post.get(reverse('posts:index'))
+        self.assertContains(response, new_post.text)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        response = self.client_for_author_of_post.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Старый текст')
+
+    def test_group_rename_refreshes_cards(self):
+        """Переименование группы сразу видно в карточках"""
+        self.client_for_author_of_post.get(reverse('posts:index'))
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Переименованная группа'
+        group.save()
+        response = self.client_for_author_of_post.get(reverse('posts:index'))
+        self.assertContains(response, group.title)
+
+    def test_card_timeout_follows_backend(self):
+        """С кешем процесса карточки живут недолго, с общим — сутки"""
+        backend = 'django.core.cache.backends.{}'
+        with self.settings(CACHES={
+            'default': {'BACKEND': backend.format('locmem.LocMemCache')}
+        }):
+            self.assertEqual(
+                cards.card_timeout(), settings.POST_CARD_LOCAL_CACHE_TIMEOUT
+            )
+        with self.settings(CACHES={
+            'default': {'BACKEND': backend.format('dummy.DummyCache')}
+        }):
+            self.assertEqual(
+                cards.card_timeout(), settings.POST_CARD_CACHE_TIMEOUT
+            )
+
+    def test_login_keeps_feed_cache(self):
+        """Вход пользователя не сбрасывает кеши лент"""
+        generation = cards.feed_generation()
+        self.author_of_post.save(update_fields=['last_login'])
+        self.assertEqual(cards.feed_generation(), generation)
+        self.author_of_post.first_name = 'Новое имя'
+        self.author_of_post.save()
+        self.assertNotEqual(cards.feed_generation(), generation)
+
+    def test_comment_keeps_feed_cache(self):
+        """Комментарий меняет только поколение своего поста"""
+        generation = cards.feed_generation()
+        post_generation = cards.generation(cards.POST, self.post.pk)
+        Comment.objects.create(
+            post=self.post, author=self.author_of_post, text='Коммент'
         )
-        self.assertEqual(
-            count_of_orig_resp,
-            response_after_create_new_post.content
+        self.assertEqual(cards.feed_generation(), generation)
+        self.assertNotEqual(
+            cards.generation(cards.POST, self.post.pk), post_generation
         )
-        cache.clear()
-        new_pesponse = self.client_for_author_of_post.get(
-            reverse('posts:index')
+
+    def test_comment_refreshes_list_pages(self):
+        """Новый комментарий сразу меняет счётчик в списках и их ETag"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author_of_post.username,)),
         )
-        new_count_of_posts = new_pesponse.content
-        self.assertNotEqual(
-            count_of_orig_resp,
-            new_count_of_posts
+        etags = {
+            url: self.authorized_client.get(url)['ETag'] for url in urls
+        }
+        Comment.objects.create(
+            post=self.post, author=self.author_of_post, text='Коммент'
         )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Комментариев: 1')
 
 
 class PaginatorViewsTest(TestCase):
@@ -368,3 +432,61 @@ class FollowTests(TestCase):
             reverse('posts:follow_index')
         )
         self.assertNotContains(response, new_post.text)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StampAuthor')
+        cls.reader = User.objects.create_user(username='StampReader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='stamp-group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_unchanged_pages_return_304(self):
+        """Повторный запрос с ETag неизменившейся страницы — 304"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Cookie', response['Vary'])
+                self.assertIn('no-cache', response['Cache-Control'])
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.content)
+
+    def test_etag_depends_on_user_and_changes(self):
+        """ETag свой у каждого пользователя и меняется при правках"""
+        url = reverse('posts:profile', args=(self.author.username,))
+        guest_etag = self.guest_client.get(url)['ETag']
+        reader_etag = self.reader_client.get(url)['ETag']
+        self.assertNotEqual(guest_etag, reader_etag)
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=reader_etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['followers_count'])
+        etag = response['ETag']
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый пост')
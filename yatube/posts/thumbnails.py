@@ -0,0 +1,90 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Миниатюры размеров из POST_THUMBNAIL_SIZES считаются фоновой задачей
+(core.tasks) после сохранения поста, а шаблоны берут только уже
+готовые и до тех пор показывают заглушку, так что запрос никогда не
+декодирует картинку.
+"""
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from . import cards
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+Thumbnail = namedtuple('Thumbnail', 'url')
+
+
+def _ready_key(name, size):
+    return f'thumbnails:ready:{size}:{name}'
+
+
+def _pending_key(name):
+    return f'thumbnails:pending:{name}'
+
+
+def ready_thumbnail(image, size):
+    """Готовая миниатюра или None. Адрес кладёт в кеш задача generate;
+    сама sorl-thumbnail здесь не вызывается, потому что на промахе
+    get_thumbnail считала бы миниатюру прямо в запросе."""
+    if not image:
+        return None
+    url = cache.get(_ready_key(image.name, size))
+    if url is None:
+        _regenerate(image)
+        return None
+    return Thumbnail(url)
+
+
+def _regenerate(image):
+    """Адреса нет: миниатюра ещё считается или запись вытеснена из
+    кеша. Задача ставится повторно, но не чаще раза за TASKS_LEASE;
+    готовую миниатюру sorl-thumbnail найдёт в своём хранилище без
+    пересчёта. С TASKS_ALWAYS_EAGER задача выполнилась бы прямо в
+    запросе, поэтому там заглушка остаётся до generate_thumbnails."""
+    post = getattr(image, 'instance', None)
+    if settings.TASKS_ALWAYS_EAGER or post is None or post.pk is None:
+        return
+    if cache.add(_pending_key(image.name), 1, settings.TASKS_LEASE):
+        generate.enqueue(post.pk)
+
+
+@task()
+def generate(post_id):
+    """Считает все миниатюры поста и обновляет его карточку."""
+    post = Post.objects.only('image').filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    for size, (geometry, options) in settings.POST_THUMBNAIL_SIZES.items():
+        thumbnail = get_thumbnail(post.image, geometry, **options)
+        cache.set(_ready_key(post.image.name, size), thumbnail.url, None)
+    cache.delete(_pending_key(post.image.name))
+    cards.bump(cards.POST, post_id)
+    cards.bump(cards.FEED, cards.FEED_ALL)
+
+
+def generate_in_worker(post_id):
+    close_old_connections()
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось посчитать миниатюры поста %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(post):
+    """Ставит миниатюры поста в очередь после фиксации транзакции."""
+    if not post.image:
+        return
+    generate.enqueue(
+        post.pk, key=f'thumbnails:{post.pk}:{post.image.name}'
+    )
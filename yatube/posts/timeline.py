@@ -0,0 +1,186 @@
+"""Лента подписок с раздачей при записи (fan-out-on-write).
+
+Новый пост копируется ссылкой в TimelineEntry каждого подписчика, и
+follow_index читает готовую ленту вместо соединения Follow с Post.
+Авторов с огромным числом подписчиков раздавать дорого, поэтому их посты
+подмешиваются при чтении (fan-out-on-read). Раздача нового поста идёт
+фоновой задачей fan_out после коммита, а не внутри запроса.
+
+При подписке переносятся только TIMELINE_BACKFILL_LIMIT последних постов
+автора. Посты старше этой границы лента дочитывает напрямую из Post
+(complete_since), так что история подписок видна целиком.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+
+from core.tasks import task
+
+from . import follows
+from .models import Follow, Post, TimelineEntry
+
+CELEBRITIES_CACHE_KEY = 'timeline:celebrities'
+COMPLETE_SINCE_CACHE_KEY = 'timeline:complete_since:{}'
+
+
+def celebrity_ids():
+    """Авторы, у которых подписчиков больше TIMELINE_FANOUT_LIMIT.
+
+    Один и тот же кешированный набор решает и при записи, и при чтении,
+    поэтому пост не теряется между двумя путями.
+    """
+    ids = cache.get(CELEBRITIES_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            Follow.objects.values('author')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=settings.TIMELINE_FANOUT_LIMIT)
+            .values_list('author', flat=True)
+        )
+        cache.set(
+            CELEBRITIES_CACHE_KEY, ids, settings.TIMELINE_CELEBRITIES_TIMEOUT
+        )
+    return ids
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(post):
+    """Разносит новый пост по лентам подписчиков автора."""
+    if post.author_id in celebrity_ids():
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk)
+        for user_id in follower_ids.iterator()
+    )
+
+
+@task()
+def fan_out(post_id):
+    """Фоновая раздача: к этому времени пост мог быть удалён."""
+    post = Post.objects.only('author_id').filter(pk=post_id).first()
+    if post is not None:
+        fan_out_post(post)
+
+
+def add_author(user_id, author_id):
+    """Подписка: переносит в ленту последние посты автора."""
+    cache.delete(COMPLETE_SINCE_CACHE_KEY.format(user_id))
+    if author_id in celebrity_ids():
+        return
+    post_ids = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('id', flat=True)[:settings.TIMELINE_BACKFILL_LIMIT]
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post_id)
+        for post_id in post_ids
+    )
+
+
+def remove_author(user_id, author_id):
+    """Отписка: убирает посты автора из ленты."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+@transaction.atomic
+def rebuild(user_id):
+    """Пересобирает ленту пользователя с нуля."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    author_ids = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+    for author_id in author_ids:
+        add_author(user_id, author_id)
+
+
+def rebuild_all():
+    """Пересобирает все ленты одним INSERT ... SELECT.
+
+    Нужна после массовой загрузки: rebuild() по каждому пользователю
+    делал бы запрос на каждую его подписку. Строки вставляются в
+    порядке уникального индекса (user, post), так он растёт с конца, а
+    не перестраивается в случайных местах. Возвращает число записей.
+    """
+    cache.delete(CELEBRITIES_CACHE_KEY)
+    cache.delete_many([
+        COMPLETE_SINCE_CACHE_KEY.format(user_id)
+        for user_id in Follow.objects.values_list(
+            'user_id', flat=True
+        ).distinct()
+    ])
+    sql = f'''
+        INSERT INTO {TimelineEntry._meta.db_table} (user_id, post_id)
+        SELECT follow.user_id, recent.id
+        FROM {Follow._meta.db_table} AS follow
+        JOIN (
+            SELECT id, author_id, ROW_NUMBER() OVER (
+                PARTITION BY author_id ORDER BY pub_date DESC
+            ) AS position
+            FROM {Post._meta.db_table}
+        ) AS recent ON recent.author_id = follow.author_id
+        WHERE recent.position <= %s AND follow.author_id NOT IN (
+            SELECT author_id FROM {Follow._meta.db_table}
+            GROUP BY author_id HAVING COUNT(*) > %s
+        )
+        ORDER BY follow.user_id, recent.id
+    '''
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, (
+                settings.TIMELINE_BACKFILL_LIMIT,
+                settings.TIMELINE_FANOUT_LIMIT,
+            ))
+            return cursor.rowcount
+
+
+def complete_since(user_id):
+    """Дата, начиная с которой материализованная лента полна, или None,
+    если в ней все посты подписок.
+
+    При подписке переносятся TIMELINE_BACKFILL_LIMIT последних постов
+    автора, поэтому пропущены могут быть только посты старше
+    N-го с конца поста какого-то автора. Граница — самый поздний такой
+    пост; с новыми постами она лишь сдвигается вперёд, так что
+    посчитанная однажды остаётся верной до следующей подписки.
+    """
+    key = COMPLETE_SINCE_CACHE_KEY.format(user_id)
+    since = cache.get(key)
+    if since is None:
+        limit = settings.TIMELINE_BACKFILL_LIMIT
+        nth_post = Post.objects.filter(
+            author_id=OuterRef('author_id')
+        ).order_by('-pub_date').values('pub_date')[limit - 1:limit]
+        since = Follow.objects.filter(user_id=user_id).annotate(
+            nth_post=Subquery(nth_post)
+        ).aggregate(since=Max('nth_post'))['since'] or False
+        cache.set(key, since, settings.TIMELINE_CELEBRITIES_TIMEOUT)
+    return since or None
+
+
+def timeline_posts(user):
+    """Посты ленты подписок: материализованная часть, посты «звёздных»
+    авторов и посты старше границы переноса, читаемые напрямую."""
+    condition = Q(id__in=TimelineEntry.objects.filter(
+        user=user
+    ).values('post_id'))
+    followees = follows.followees(user.pk)
+    followed = celebrity_ids() & followees
+    if followed:
+        condition |= Q(author_id__in=followed)
+    since = complete_since(user.pk)
+    if since is not None:
+        condition |= Q(author_id__in=followees, pub_date__lt=since)
+    return Post.objects.filter(condition)
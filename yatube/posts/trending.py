@@ -0,0 +1,195 @@
+"""Лента популярного: затухающий рейтинг, который копится при записи.
+
+Событие (новый пост, комментарий, подписка на автора) добавляет посту
+weight * 2 ** ((t - эпоха) / TRENDING_HALF_LIFE). Вместо того чтобы
+со временем уменьшать рейтинги всех постов, новые события весят всё
+больше: порядок тот же, а каждое событие — одно UPDATE с F()-выражением.
+Чтобы числа не росли без предела, фоновая задача renormalize сдвигает
+эпоху: умножает рейтинги на общий множитель и обнуляет затухшие, и те
+выпадают из частичного индекса post_trending_idx. Страница популярного
+читает этот индекс по диапазону, без агрегации по Comment.
+"""
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Power
+from django.utils import timezone
+
+from core.tasks import task
+from users.models import Profile
+
+from . import cards
+from .models import Comment, Post, TrendingEpoch
+
+EPOCH_CACHE_KEY = 'trending:epoch'
+
+
+def _float(value):
+    return Value(float(value), output_field=FloatField())
+
+
+def epoch():
+    """Начало эпохи; старую эпоху заодно ставит на сдвиг."""
+    started = cache.get(EPOCH_CACHE_KEY)
+    if started is None:
+        started = TrendingEpoch.objects.get_or_create(
+            pk=1, defaults={'started': time.time()}
+        )[0].started
+        cache.set(
+            EPOCH_CACHE_KEY, started, settings.TRENDING_RENORMALIZE_AFTER
+        )
+    if time.time() - started > settings.TRENDING_RENORMALIZE_AFTER:
+        renormalize.enqueue(key=f'trending:renormalize:{started}')
+    return started
+
+
+def contribution(weight):
+    """Вклад события сейчас — выражение для UPDATE. Эпоха читается
+    подзапросом в том же операторе, поэтому сдвиг эпохи между чтением
+    и записью рейтинг не исказит."""
+    started = Coalesce(
+        Subquery(TrendingEpoch.objects.filter(pk=1).values('started')[:1]),
+        _float(epoch()),
+    )
+    exponent = (_float(time.time()) - started) / _float(
+        settings.TRENDING_HALF_LIFE
+    )
+    return _float(weight) * Power(_float(2), exponent)
+
+
+def changed():
+    """Рейтинги изменились: метка и кеш страницы популярного устарели."""
+    cards.bump(cards.TRENDING, cards.FEED_ALL)
+
+
+def bump(posts, weight):
+    if posts.update(score=F('score') + contribution(weight)):
+        changed()
+
+
+def post_weight(followers):
+    """Охват: подписчики автора, логарифмически — чтобы посты самых
+    популярных авторов не занимали ленту одним своим охватом."""
+    return settings.TRENDING_POST_WEIGHT + (
+        settings.TRENDING_REACH_WEIGHT * math.log2(1 + followers)
+    )
+
+
+def post_created(post):
+    followers = Profile.objects.filter(user_id=post.author_id).values_list(
+        'followers_count', flat=True
+    ).first() or 0
+    bump(Post.objects.filter(pk=post.pk), post_weight(followers))
+
+
+def comment_added(post_id):
+    bump(Post.objects.filter(pk=post_id), settings.TRENDING_COMMENT_WEIGHT)
+
+
+def follower_added(author_id):
+    """Новый подписчик расширяет охват свежих постов автора."""
+    border = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+    bump(
+        Post.objects.filter(author_id=author_id, pub_date__gte=border),
+        settings.TRENDING_FOLLOW_WEIGHT,
+    )
+
+
+def follower_removed(author_id):
+    """Отписка забирает вклад подписки обратно, не ниже нуля: иначе
+    подписка и отписка по кругу накручивали бы рейтинг."""
+    border = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+    updated = Post.objects.filter(
+        author_id=author_id, pub_date__gte=border, score__gt=0
+    ).update(score=Greatest(
+        F('score') - contribution(settings.TRENDING_FOLLOW_WEIGHT),
+        _float(0),
+    ))
+    if updated:
+        changed()
+
+
+def _invalidate():
+    cache.delete(EPOCH_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(EPOCH_CACHE_KEY))
+    changed()
+
+
+@task()
+def renormalize():
+    """Сдвигает эпоху на текущий момент: рейтинги умножаются на общий
+    множитель, ниже TRENDING_MIN_SCORE — обнуляются."""
+    now = time.time()
+    with transaction.atomic():
+        current, _ = TrendingEpoch.objects.select_for_update().get_or_create(
+            pk=1, defaults={'started': now}
+        )
+        factor = 2 ** ((current.started - now) / settings.TRENDING_HALF_LIFE)
+        scored = Post.objects.filter(score__gt=0)
+        if factor > 0:
+            scored.filter(
+                score__lt=settings.TRENDING_MIN_SCORE / factor
+            ).update(score=0)
+            scored.update(score=F('score') * factor)
+        else:
+            scored.update(score=0)
+        current.started = now
+        current.save(update_fields=['started'])
+        _invalidate()
+
+
+def rebuild():
+    """Пересчитывает рейтинги с нуля по постам и комментариям последних
+    TRENDING_WINDOW секунд — после импорта или смены весов. Подписки
+    без даты учитываются только нынешним охватом автора. Возвращает
+    число постов с рейтингом.
+    """
+    now = time.time()
+    half_life = settings.TRENDING_HALF_LIFE
+    border = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+
+    def decay(moment):
+        return 2 ** ((moment.timestamp() - now) / half_life)
+
+    recent = Post.objects.filter(pub_date__gte=border).order_by('pk').only(
+        'pub_date', 'author_id'
+    )
+    with transaction.atomic():
+        TrendingEpoch.objects.update_or_create(
+            pk=1, defaults={'started': now}
+        )
+        Post.objects.filter(score__gt=0).update(score=0)
+        last = scored = 0
+        while True:
+            batch = list(
+                recent.filter(pk__gt=last)[:settings.TRENDING_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last = batch[-1].pk
+            followers = dict(Profile.objects.filter(
+                user_id__in={post.author_id for post in batch}
+            ).values_list('user_id', 'followers_count'))
+            scores = {
+                post.pk: post_weight(followers.get(post.author_id, 0))
+                * decay(post.pub_date)
+                for post in batch
+            }
+            comments = Comment.objects.filter(post__in=batch).values_list(
+                'post_id', 'created'
+            )
+            for post_id, created in comments:
+                scores[post_id] += (
+                    settings.TRENDING_COMMENT_WEIGHT * decay(created)
+                )
+            for post in batch:
+                post.score = scores[post.pk]
+            Post.objects.bulk_update(batch, ['score'])
+            scored += len(batch)
+        _invalidate()
+    return scored
@@ -1,23 +1,48 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import (
+    HttpResponseBadRequest, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.conf import settings
-from django.views.decorators.cache import cache_page
+from django.db import transaction
 from django.urls import reverse
 
-from posts.forms import PostForm, CommentForm
+from core.cache import stampede_cache_page
+from core.conditional import conditional_page
+from core.db.replicas import replica_reads
+from posts.forms import ExportForm, PostForm, CommentForm
+from .cards import list_generation, popular_generation
+from .counters import get_profile
 from .models import Post, Group, User, Comment, Follow
+from .paginator import CursorPaginator
+from .search import SearchPaginator
+from . import export as exports, follows, stamps, thumbnails
+from .timeline import timeline_posts
 
 
-def get_page_object(request, posts):
-    paginator = Paginator(posts, settings.POSTS_AMOUNT)
+def get_page_object(request, posts, approximate_total=False):
+    # Нумерованные ссылки ?page= продолжают работать, всё остальное
+    # листается курсором без COUNT(*) и OFFSET.
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if page_number is not None:
+        paginator = Paginator(posts, settings.POSTS_AMOUNT)
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(
+        posts, settings.POSTS_AMOUNT, approximate_total=approximate_total
+    )
+    return paginator.get_page(request.GET.get('cursor'))
 
 
-@cache_page(20, key_prefix="index_page")
+@replica_reads
+@conditional_page(stamps.feed, latest=stamps.latest_post, personal=True)
+@stampede_cache_page(
+    settings.FEED_CACHE_TIMEOUT, key_prefix='index_page',
+    version=list_generation,
+)
 def index(request):
-    posts = Post.objects.select_related('author', 'group')
+    posts = Post.objects.for_feed()
     page_obj = get_page_object(request, posts)
     context = {
         'page_obj': page_obj,
@@ -25,10 +50,35 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@conditional_page(stamps.popular, personal=True)
+@stampede_cache_page(
+    settings.FEED_CACHE_TIMEOUT, key_prefix='popular_page',
+    version=popular_generation,
+)
+def popular(request):
+    paginator = CursorPaginator(
+        Post.objects.trending(), settings.POSTS_AMOUNT,
+        ordering=('-score', '-id'),
+    )
+    context = {
+        'page_obj': paginator.get_page(request.GET.get('cursor')),
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+@replica_reads
+@conditional_page(
+    stamps.feed, latest=stamps.latest_group_post, personal=True
+)
+@stampede_cache_page(
+    settings.FEED_CACHE_TIMEOUT, key_prefix='group_page',
+    version=list_generation,
+)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
-    page_obj = get_page_object(request, posts)
+    posts = group.posts.for_feed()
+    page_obj = get_page_object(request, posts, approximate_total=True)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -36,30 +86,42 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@conditional_page(
+    stamps.profile, latest=stamps.latest_author_post, personal=True
+)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    user_posts = Post.objects.filter(author=author)
-    paginator = Paginator(user_posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    if request.user.is_authenticated and request.user != author:
-        following = Follow.objects.select_related(
-            'user', 'author'
-        ).exists()
-    else:
-        following = False
+    user_posts = Post.objects.for_feed().filter(author=author)
+    page_obj = get_page_object(request, user_posts)
+    following = follows.is_following(request.user.pk, author.pk)
+    author_profile = get_profile(author)
     context = {
         'author': author,
         'user_posts': user_posts,
         'page_obj': page_obj,
         'following': following,
+        'posts_count': author_profile.posts_count,
+        'followers_count': author_profile.followers_count,
+        'following_count': author_profile.following_count,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def get_comments_page(post, cursor):
+    paginator = CursorPaginator(
+        Comment.objects.for_post(post),
+        settings.COMMENTS_AMOUNT,
+        ordering=('-created', '-id'),
+    )
+    return paginator.get_page(cursor)
+
+
+@replica_reads
+@conditional_page(stamps.post_page, personal=True)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = Comment.objects.filter(post_id=post_id)
+    post = get_object_or_404(Post.objects.for_detail(), pk=post_id)
+    comments = get_comments_page(post, request.GET.get('comments'))
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -69,7 +131,69 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая страница комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    comments = get_comments_page(post, request.GET.get('cursor'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'results': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    query = query[:settings.SEARCH_QUERY_MAX_LENGTH]
+    page_obj = None
+    if query:
+        paginator = SearchPaginator(query, settings.POSTS_AMOUNT)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@staff_member_required
+def export(request):
+    """Потоковая выгрузка постов или комментариев для персонала."""
+    data = request.GET.copy()
+    for name, field in ExportForm.base_fields.items():
+        data.setdefault(name, field.initial or '')
+    form = ExportForm(data)
+    if not form.is_valid():
+        return HttpResponseBadRequest(
+            form.errors.as_text(), content_type='text/plain; charset=utf-8'
+        )
+    kind = form.cleaned_data['kind']
+    export_format = form.cleaned_data['format']
+    response = StreamingHttpResponse(
+        exports.stream(kind, export_format, **form.filters()),
+        content_type=exports.CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{exports.filename(kind, export_format)}"'
+    )
+    return response
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -80,13 +204,14 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    thumbnails.schedule(post)
     return redirect('posts:profile', post.author)
 
 
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         return redirect('posts:post_detail', post.id)
     form = PostForm(
         request.POST or None,
@@ -96,14 +221,17 @@ def post_edit(request, post_id):
     context = {'form': form}
     if not form.is_valid():
         return render(request, 'posts/create.html', context)
-    form.save()
+    post = form.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
     return redirect('posts:post_detail', post.id)
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     # Получите пост и сохраните его в переменную post.
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -114,8 +242,12 @@ def add_comment(request, post_id):
 
 
 @login_required
+@replica_reads
+@conditional_page(
+    stamps.timeline, latest=stamps.latest_timeline_post, personal=True
+)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = timeline_posts(request.user).for_feed()
     page_obj = get_page_object(request, posts)
     context = {
         'page_obj': page_obj
@@ -124,15 +256,19 @@ def follow_index(request):
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     # Подписаться на автора
-    author = User.objects.get(username=username)
+    # Запись не сверяется с кешем подписок: устаревшее «уже подписан»
+    # молча потеряло бы подписку, а повтор отсекает уникальность Follow.
+    author = get_object_or_404(User, username=username)
     if request.user != author:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect(reverse('posts:profile', args=[username]))
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     # Отписаться
     author = get_object_or_404(User, username=username)
@@ -1,3 +1,17 @@
+from django.contrib import admin
 
+from .models import Profile
 
-# Register your models here.
+
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count'
+    )
+    search_fields = ('user__username',)
+    readonly_fields = (
+        'posts_count', 'followers_count', 'following_count',
+        'unread_notifications',
+    )
+
+
+admin.site.register(Profile, ProfileAdmin)
@@ -1,3 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db import models
 
+User = get_user_model()
 
-# Create your models here.
+
+class Profile(models.Model):
+    """Счётчики пользователя, чтобы не считать их COUNT на каждой
+    странице. Меняются только F()-выражениями."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    unread_notifications = models.PositiveIntegerField(
+        'Непрочитанных уведомлений', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return str(self.user)
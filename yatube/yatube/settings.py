@@ -38,6 +38,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'django.contrib.admin',
@@ -47,10 +48,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'users.apps.UsersConfig',
+    'notifications.apps.NotificationsConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.performance.PerformanceMiddleware',
+    'core.middleware.query_log.QueryLogMiddleware',
+    'core.middleware.replica.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,7 +70,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -75,6 +80,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'notifications.context_processors.unread',
             ],
         },
     },
@@ -92,6 +98,38 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# Режим для небольших инсталляций на SQLite с конкурентной записью:
+# WAL, BEGIN IMMEDIATE, повтор при блокировке и постоянные соединения
+# (core.db.backends.sqlite3; сравнение — manage.py bench_writes).
+if os.getenv('YATUBE_SQLITE_TUNED'):
+    DATABASES['default'].update(
+        ENGINE='core.db.backends.sqlite3', CONN_MAX_AGE=600,
+    )
+
+# Реплики для чтения лент (core.db.replicas). YATUBE_REPLICAS — пути
+# к копиям базы через запятую; для PostgreSQL реплики описываются в
+# DATABASES вручную и перечисляются в REPLICA_DATABASES.
+REPLICA_DATABASES = []
+for index, name in enumerate(
+    filter(None, os.getenv('YATUBE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica{index}'] = dict(
+        DATABASES['default'], NAME=name, TEST={'MIRROR': 'default'}
+    )
+    REPLICA_DATABASES.append(f'replica{index}')
+DATABASE_ROUTERS = ['core.db.replicas.ReplicaRouter']
+# Модели, которые можно читать с реплик; сессии и пользователи для
+# входа читаются только с primary.
+REPLICA_APPS = ('posts', 'users')
+# Сколько секунд клиент читает с primary после своей записи.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_until'
+# Допустимое отставание реплики и как часто его проверять, секунд.
+# Отставание — разница самых поздних значений маркера на primary и
+# реплике.
+REPLICA_MAX_LAG = 5
+REPLICA_CHECK_INTERVAL = 5
+REPLICA_LAG_MARKER = 'posts.Post.pub_date'
 
 
 # Password validation
@@ -144,14 +182,168 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_AMOUNT = 10
 POSTS_AMOUNT2 = 3
+COMMENTS_AMOUNT = 20
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
+# Бэкенд кеша выбирается переменной окружения YATUBE_CACHE.
+# locmem у каждого воркера свой, file и memcached общие для всех.
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'YATUBE_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('YATUBE_CACHE', 'locmem')],
+}
+
+# Срок жизни страниц лент в stampede_cache_page.
+FEED_CACHE_TIMEOUT = 20
+
+POSTS_COUNT_CACHE_TIMEOUT = 60
+
+# Лента подписок: авторы с числом подписчиков больше лимита
+# не раздаются при записи, а читаются напрямую.
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_CELEBRITIES_TIMEOUT = 300
+# Сколько постов автора переносится в ленту при подписке; более старые
+# читаются напрямую. После увеличения нужен manage.py rebuild_timelines.
+TIMELINE_BACKFILL_LIMIT = 1000
+TIMELINE_BATCH_SIZE = 500
+# Множества подписок и подписчиков (posts.follows); сбрасываются при
+# каждой подписке и отписке, таймаут — лишь страховка.
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+
+# Лента популярного (posts.trending). Вклад события затухает вдвое за
+# TRENDING_HALF_LIFE секунд; эпоха сдвигается фоновой задачей, когда
+# станет старше TRENDING_RENORMALIZE_AFTER, а рейтинги ниже
+# TRENDING_MIN_SCORE при этом обнуляются. Подписка на автора поднимает
+# его посты не старше TRENDING_WINDOW.
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_RENORMALIZE_AFTER = 60 * 60 * 24
+TRENDING_MIN_SCORE = 0.01
+TRENDING_WINDOW = 60 * 60 * 24 * 3
+TRENDING_POST_WEIGHT = 1.0
+# Множитель log2(1 + подписчиков автора) для нового поста.
+TRENDING_REACH_WEIGHT = 0.5
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_FOLLOW_WEIGHT = 0.25
+TRENDING_BATCH_SIZE = 1000
+
+# Карточки постов ключуются поколениями, поэтому живут долго. Но
+# поколение в locmem меняется только в процессе, где случилась правка:
+# с locmem карточки живут POST_CARD_LOCAL_CACHE_TIMEOUT, чтобы другие
+# воркеры отдавали старую карточку не дольше страниц лент. Долгий срок
+# работает с общим кешем (YATUBE_CACHE=file или memcached).
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+POST_CARD_LOCAL_CACHE_TIMEOUT = FEED_CACHE_TIMEOUT
+
+# Миниатюры картинок постов: имя -> (геометрия, опции sorl-thumbnail).
+# Считаются в фоне после сохранения поста, шаблоны берут только готовые.
+POST_THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Приём картинок постов: больше этого размера уменьшаются,
+# остальные перекодируются в POST_IMAGE_FORMAT без EXIF.
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_PASSTHROUGH_FORMATS = ('GIF',)
+
+# Полнотекстовый поиск. На базах без FTS5 подойдёт
+# posts.search.backends.DatabaseSearchBackend.
+POSTS_SEARCH_BACKEND = 'posts.search.backends.SQLiteFTSBackend'
+# Во сколько раз падает релевантность поста за каждые N дней возраста.
+SEARCH_RECENCY_DAYS = 30
+SEARCH_BATCH_SIZE = 1000
+SEARCH_QUERY_MAX_LENGTH = 200
+SEARCH_ADMIN_LIMIT = 1000
+
+# Фоновые задачи (core.tasks). В режиме eager задачи выполняются сразу
+# при постановке, без воркера. Иначе очередь после коммитов разбирают
+# TASKS_LOCAL_WORKERS потоков веб-процесса; при 0 нужен
+# manage.py runworker.
+TASKS_ALWAYS_EAGER = DEBUG
+TASKS_LOCAL_WORKERS = 2
+TASKS_WORKER_THREADS = 4
+TASKS_POLL_INTERVAL = 1
+# Аренда задачи воркером, секунд: после неё задачу заберёт другой.
+TASKS_LEASE = 300
+TASKS_MAX_ATTEMPTS = 5
+# Пауза перед повтором: TASKS_RETRY_DELAY * 2 ** (попытка - 1) секунд.
+TASKS_RETRY_DELAY = 10
+TASKS_KEEP_DONE = 60 * 60 * 24 * 7
+
+# Личные части меток conditional_page и ключей stampede_cache_page:
+# функции request -> значение, меняющие страницу пользователя.
+CONDITIONAL_PERSONAL_STAMPS = ['notifications.counters.stamp']
+
+# Уведомления: партия раздачи (bulk_create и UPDATE счётчиков), срок
+# жизни кешированного числа непрочитанных и параметры дайджестов.
+NOTIFICATIONS_AMOUNT = 20
+NOTIFICATIONS_BATCH_SIZE = 1000
+NOTIFICATIONS_UNREAD_TIMEOUT = 60 * 5
+NOTIFICATIONS_DIGEST_BATCH_SIZE = 200
+# Сколько уведомлений перечислять в письме, остальные — числом.
+NOTIFICATIONS_DIGEST_LIMIT = 20
+
+# Потоковая выгрузка (posts.export): строк на одну выборку из базы и на
+# один кусок ответа.
+EXPORT_CHUNK_SIZE = 2000
+
+# Метрики запросов (core.middleware.performance). Гистограммы копятся
+# в процессе и раз в интервал сбрасываются в кеш; команде perf_report
+# нужен общий кеш (file или memcached), страница
+# /admin/performance/ видит и locmem своего процесса.
+PERFORMANCE_SERVER_TIMING = DEBUG
+PERFORMANCE_FLUSH_INTERVAL = 10
+
+# Журнал медленных и повторяющихся SQL (core.query_log): доля
+# запросов под наблюдением, порог медленного запроса и сколько раз
+# одинаковый запрос может повториться, прежде чем попасть в журнал.
+QUERY_LOG_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+QUERY_LOG_SLOW_MS = 100
+QUERY_LOG_DUPLICATE_THRESHOLD = 5
+QUERY_LOG_FILE = os.path.join(BASE_DIR, 'logs', 'queries.jsonl')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'query_log': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.query_log': {
+            'handlers': ['query_log'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }